@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+# Ahead-of-time build of the backtest simulation kernel, so run_backtest skips the
+# cold-start JIT compile:
+#   python -m execution._aot
+# writes execution/backtest_kernel.*.so next to this file. run_backtest falls back
+# to the @njit kernel when the extension is missing.
+
+import os
+
+from numba.pycc import CC
+
+from execution.backtester import _simulate
+
+cc = CC("backtest_kernel")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# (close, atr, sig_mask, start, cash, cfg) -> (equity, wins, exits)
+cc.export(
+    "simulate",
+    "Tuple((f8[::1], i8, i8))(f8[::1], f8[::1], b1[::1], i8, f8, Tuple((f8, f8, f8, f8, f8, f8, i8)))",
+)(_simulate.py_func)
+
+
+if __name__ == "__main__":
+    cc.compile()
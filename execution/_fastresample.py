@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def resample_ohlcv(
+    ts_ns: np.ndarray,
+    o: np.ndarray,
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    v: np.ndarray,
+    rule_ns: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # label="right", closed="right" buckets over time-ordered bars, in one scan:
+    # a bar closing exactly on an edge belongs to that edge, empty buckets never appear.
+    # Outputs are sized for the worst case (one bar per bucket) and trimmed at the end.
+    n = ts_ns.shape[0]
+    lab = np.empty(n, dtype=np.int64)
+    ro = np.empty(n)
+    rh = np.empty(n)
+    rl = np.empty(n)
+    rc = np.empty(n)
+    rv = np.empty(n)
+    k = -1
+    cur = 0
+    for i in range(n):
+        b = -(-ts_ns[i] // rule_ns)
+        if k < 0 or b != cur:
+            k += 1
+            cur = b
+            lab[k] = b * rule_ns
+            ro[k] = o[i]
+            rh[k] = h[i]
+            rl[k] = l[i]
+            rv[k] = v[i]
+        else:
+            rh[k] = max(rh[k], h[i])
+            rl[k] = min(rl[k], l[i])
+            rv[k] += v[i]
+        rc[k] = c[i]
+    m = k + 1
+    return lab[:m], ro[:m], rh[:m], rl[:m], rc[:m], rv[:m]
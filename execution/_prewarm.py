@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+# Compiles every @njit kernel once on dummy data so Numba writes its on-disk cache
+# (NUMBA_CACHE_DIR), e.g. at image build time:
+#   python -m execution._prewarm
+# Processes started afterwards load the cached machine code instead of JIT-compiling
+# on the first live bar / backtest.
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from execution.backtester import run_backtest
+from execution.ohlcv_ring import OHLCVRing, candles_frame, resample
+from execution.risk.manager import RiskManager
+from execution.strategy.orderbook_alpha import bars_from_df, compute_long_signal
+
+
+def main() -> None:
+    n = 400  # past the backtest's warmup start bar
+    close = 100.0 + np.sin(np.arange(n) / 10.0)
+    candles = {
+        "close_time": 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 900_000,
+        "open": close,
+        "high": close + 0.5,
+        "low": close - 0.5,
+        "close": close,
+        "volume": np.ones(n),
+    }
+
+    ring = OHLCVRing(capacity=n)
+    ring.load(candles)
+    resample(ring, 30 * 60 * 1_000_000_000)
+
+    df15 = candles_frame(candles)
+    b15 = bars_from_df(df15)
+    compute_long_signal(b15, b15, b15, 12, 26, 14, 50.0, 14)
+
+    settings = SimpleNamespace(
+        EMA_FAST=12,
+        EMA_SLOW=26,
+        RSI_PERIOD=14,
+        RSI_LONG_MIN=50.0,
+        ATR_PERIOD=14,
+        POSITION_PCT=0.03,
+        PARTIAL_TP_PCT=0.5,
+        TRAILING_ENABLED=True,
+    )
+    risk = RiskManager(0.03, 1.5, 3.0, 0.001, 0.001, 5.0, 0.5)
+    run_backtest(df15, settings, risk)
+
+
+if __name__ == "__main__":
+    main()
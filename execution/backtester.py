@@ -5,86 +5,226 @@ from dataclasses import dataclass
 
 import numpy as np
 import pandas as pd
+from numba import njit
 
-from execution.indicators import ema, rsi, atr
-from execution.strategy.orderbook_alpha import compute_long_signal
+from execution.indicators import _ewm_coeffs, _ewm_step, _rsi_value
+from execution.strategy.orderbook_alpha import long_entry_mask, warmup_ok
 from execution.risk.manager import RiskManager
 
+try:
+    from execution.backtest_kernel import simulate as _simulate_aot  # built by execution._aot
+except ImportError:  # not built: JIT-compile _simulate on first use
+    _simulate_aot = None
+
 log = logging.getLogger("backtester")
 
+_NS_30M = 30 * 60 * 1_000_000_000
+_NS_1H = 60 * 60 * 1_000_000_000
+_START_BAR = 300  # first simulated 15m bar; the equity curve has len(df15) - _START_BAR rows
 
-def _max_drawdown(equity: pd.Series) -> float:
-    peak = equity.cummax()
-    dd = (equity - peak) / peak.replace(0, np.nan)
-    return float(dd.min()) if len(dd) else 0.0
 
+@njit(cache=True)
+def _metrics(equity: np.ndarray, periods_per_year: int) -> tuple[float, float]:
+    # max drawdown and Sharpe of the per-bar returns in one pass over the curve;
+    # a zero peak yields no drawdown sample, fewer than 50 bars or flat returns give Sharpe 0
+    n = equity.shape[0]
+    if n == 0:
+        return 0.0, 0.0
 
-def _sharpe(returns: pd.Series, periods_per_year: int) -> float:
-    if len(returns) < 50 or returns.std(ddof=0) == 0:
-        return 0.0
-    return float((returns.mean() / returns.std(ddof=0)) * np.sqrt(periods_per_year))
+    mdd = np.nan
+    peak = equity[0]
+    rets = np.empty(n)
+    rets[0] = 0.0
+    for i in range(n):
+        x = equity[i]
+        if x > peak:
+            peak = x
+        if peak != 0.0:
+            dd = (x - peak) / peak
+            if not dd >= mdd:
+                mdd = dd
+        if i > 0:
+            r = x / equity[i - 1] - 1.0
+            rets[i] = r if r == r else 0.0
 
+    if n < 50:
+        return mdd, 0.0
+    sd = np.std(rets)
+    if sd == 0.0:
+        return mdd, 0.0
+    return mdd, (np.mean(rets) / sd) * np.sqrt(periods_per_year)
 
-@dataclass
-class BacktestReport:
-    pnl: float
-    win_rate: float
-    max_dd: float
-    sharpe: float
-    trades: int
 
+@njit(cache=True)
+def _fused_indicators(
+    ts_ns: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    fast: int,
+    slow: int,
+    rsi_p: int,
+    atr_p: int,
+) -> tuple:
+    # One pass over the 15m bars: 15m EMA/RSI/ATR plus the 30m/1h close EMAs of
+    # label="right", closed="right" epoch-aligned buckets. A bucket becomes visible
+    # once a bar closes on its edge or a bar of the next bucket arrives, which equals
+    # searchsorted(side="right") - 1 over the resampled index.
+    n = close.shape[0]
+    k_fast = _ewm_coeffs(2.0 / (1.0 + fast))
+    k_slow = _ewm_coeffs(2.0 / (1.0 + slow))
+    k_rsi = _ewm_coeffs(1.0 / rsi_p)
+    k_atr = _ewm_coeffs(1.0 / atr_p)
+
+    ef15 = np.empty(n)
+    es15 = np.empty(n)
+    r15 = np.empty(n)
+    a15 = np.empty(n)
+    up30 = np.zeros(n, dtype=np.bool_)
+    up1h = np.zeros(n, dtype=np.bool_)
+    n30 = np.zeros(n, dtype=np.int64)
+    n1h = np.zeros(n, dtype=np.int64)
+
+    ef = es = g = lo = tr_w = np.nan
+    rules = (_NS_30M, _NS_1H)
+    bucket = np.full(2, -1, dtype=np.int64)
+    pending = np.zeros(2, dtype=np.bool_)
+    last_close = np.zeros(2)
+    hef = np.full(2, np.nan)
+    hes = np.full(2, np.nan)
+    cnt = np.zeros(2, dtype=np.int64)
+
+    for i in range(n):
+        c = close[i]
+        ef = _ewm_step(ef, c, k_fast)
+        es = _ewm_step(es, c, k_slow)
+        ef15[i] = ef
+        es15[i] = es
+
+        tr = abs(high[i] - low[i])
+        if i > 0:
+            pc = close[i - 1]
+            d = c - pc
+            g = _ewm_step(g, max(d, 0.0), k_rsi)
+            lo = _ewm_step(lo, max(-d, 0.0), k_rsi)
+            tr = max(tr, abs(high[i] - pc), abs(low[i] - pc))
+        r15[i] = _rsi_value(g, lo)
+        tr_w = _ewm_step(tr_w, tr, k_atr)
+        a15[i] = tr_w
+
+        t = ts_ns[i]
+        for k in range(2):
+            rule = rules[k]
+            b = -(-t // rule)
+            if b != bucket[k]:
+                if pending[k]:
+                    hef[k] = _ewm_step(hef[k], last_close[k], k_fast)
+                    hes[k] = _ewm_step(hes[k], last_close[k], k_slow)
+                    cnt[k] += 1
+                bucket[k] = b
+            last_close[k] = c
+            pending[k] = True
+            if b * rule == t:
+                hef[k] = _ewm_step(hef[k], c, k_fast)
+                hes[k] = _ewm_step(hes[k], c, k_slow)
+                cnt[k] += 1
+                pending[k] = False
+        up30[i] = hef[0] > hes[0]
+        n30[i] = cnt[0]
+        up1h[i] = hef[1] > hes[1]
+        n1h[i] = cnt[1]
+
+    return ef15, es15, r15, a15, up30, n30, up1h, n1h
+
+
+# RiskManager arithmetic, inlined for the kernel
+
+
+@njit(cache=True)
+def _apply_slippage(price: float, slippage_bps: float, is_entry: bool) -> float:
+    slip = price * (slippage_bps / 10000.0)
+    return price + slip if is_entry else price - slip
+
+
+@njit(cache=True)
+def _fee_usd(notional: float, taker_fee: float) -> float:
+    return notional * taker_fee
+
+
+@njit(cache=True)
+def _stops_from_atr(entry: float, atr_val: float, stop_mult: float, tp_mult: float) -> tuple[float, float]:
+    return entry - atr_val * stop_mult, entry + atr_val * tp_mult
+
+
+@njit(cache=True)
+def _trailing_stop(best_price: float, atr_val: float, stop_mult: float) -> float:
+    return best_price - atr_val * stop_mult
+
+
+@njit("Tuple((f8, f8, f8, b1, b1, b1))(f8, f8, f8, f8, f8, f8, f8, b1, b1)", cache=True)
+def exit_step(
+    price: float,
+    best: float,
+    trailing: float,
+    stop: float,
+    tp: float,
+    atr_val: float,
+    stop_mult: float,
+    trailing_enabled: bool,
+    partial_done: bool,
+) -> tuple[float, float, float, bool, bool, bool]:
+    # one closed bar of an open long, shared by the backtest kernel and the live engine:
+    # -> (best, trailing, stop_level, take_partial, stop_out, take_rest); the caller fills
+    # the partial first, then either stops out or (partial done) takes the rest at TP
+    if price > best:
+        best = price
+        if trailing_enabled:
+            trailing = _trailing_stop(best, atr_val, stop_mult)
+    stop_level = min(stop, trailing) if trailing_enabled else stop
+    take_partial = (not partial_done) and price >= tp
+    stop_out = price <= stop_level
+    take_rest = (partial_done or take_partial) and price >= tp and not stop_out
+    return best, trailing, stop_level, take_partial, stop_out, take_rest
+
+
+@njit(cache=True)
+def _simulate(
+    close: np.ndarray,
+    atr_v: np.ndarray,
+    sig_mask: np.ndarray,
+    start: int,
+    cash: float,
+    cfg: tuple,
+) -> tuple[np.ndarray, int, int]:
+    position_pct, stop_mult, tp_mult, partial_pct, slippage_bps, taker_fee, trailing_enabled = cfg
 
-def run_backtest(
-    df15: pd.DataFrame,
-    settings,
-    risk: RiskManager,
-    start_balance: float = 10000.0,
-) -> BacktestReport:
-    # resample
-    def resample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
-        o = df["open"].resample(rule, label="right", closed="right").first()
-        h = df["high"].resample(rule, label="right", closed="right").max()
-        l = df["low"].resample(rule, label="right", closed="right").min()
-        c = df["close"].resample(rule, label="right", closed="right").last()
-        v = df["volume"].resample(rule, label="right", closed="right").sum()
-        return pd.DataFrame({"open": o, "high": h, "low": l, "close": c, "volume": v}).dropna()
-
-    df30 = resample(df15, "30min")
-    df1h = resample(df15, "60min")
-
-    cash = start_balance
     qty = 0.0
     entry = 0.0
     stop = 0.0
     tp = 0.0
     best = 0.0
     trailing = 0.0
+    atr_val = 0.0
     partial_done = False
 
-    equity = []
+    n = close.shape[0]
+    equity = np.empty(max(n - start, 0), dtype=np.float64)
     wins = 0
     exits = 0
 
-    idxs = df15.index
-    for i in range(300, len(df15)):
-        t = idxs[i]
-        w15 = df15.iloc[: i + 1]
-        w30 = df30[df30.index <= t]
-        w1h = df1h[df1h.index <= t]
-        price = float(w15["close"].iloc[-1])
+    for i in range(start, n):
+        price = close[i]
 
         # exits
         if qty > 0:
-            if price > best:
-                best = price
-                trailing = risk.trailing_stop(best, atr_val)
-
-            stop_level = min(stop, trailing) if settings.TRAILING_ENABLED else stop
+            best, trailing, stop_level, take_partial, stop_out, take_rest = exit_step(
+                price, best, trailing, stop, tp, atr_val, stop_mult, trailing_enabled != 0, partial_done
+            )
 
-            if (not partial_done) and price >= tp:
-                q_part = qty * settings.PARTIAL_TP_PCT
-                px = risk.apply_slippage(price, is_entry=False)
-                fee = risk.fee_usd(q_part * px, taker=True)
+            if take_partial:
+                q_part = qty * partial_pct
+                px = _apply_slippage(price, slippage_bps, False)
+                fee = _fee_usd(q_part * px, taker_fee)
                 cash += q_part * px - fee
                 if (px - entry) > 0:
                     wins += 1
@@ -92,9 +232,9 @@ def run_backtest(
                 qty -= q_part
                 partial_done = True
 
-            if price <= stop_level:
-                px = risk.apply_slippage(price, is_entry=False)
-                fee = risk.fee_usd(qty * px, taker=True)
+            if stop_out:
+                px = _apply_slippage(price, slippage_bps, False)
+                fee = _fee_usd(qty * px, taker_fee)
                 cash += qty * px - fee
                 if (px - entry) > 0:
                     wins += 1
@@ -102,9 +242,9 @@ def run_backtest(
                 qty = 0.0
                 partial_done = False
 
-            if qty > 0 and partial_done and price >= tp:
-                px = risk.apply_slippage(price, is_entry=False)
-                fee = risk.fee_usd(qty * px, taker=True)
+            if qty > 0 and take_rest:
+                px = _apply_slippage(price, slippage_bps, False)
+                fee = _fee_usd(qty * px, taker_fee)
                 cash += qty * px - fee
                 if (px - entry) > 0:
                     wins += 1
@@ -113,37 +253,70 @@ def run_backtest(
                 partial_done = False
 
         # entries
-        if qty == 0:
-            sig = compute_long_signal(
-                w15,
-                w30,
-                w1h,
-                settings.EMA_FAST,
-                settings.EMA_SLOW,
-                settings.RSI_PERIOD,
-                settings.RSI_LONG_MIN,
-                settings.ATR_PERIOD,
-            )
-            if sig and sig.action == "BUY":
-                notional = cash * settings.POSITION_PCT
-                px = risk.apply_slippage(price, is_entry=True)
-                q = notional / max(px, 1e-12)
-                fee = risk.fee_usd(notional, taker=True)
-                cash -= notional + fee
-                entry = px
-                atr_val = sig.atr_value
-                stop, tp = risk.stops_from_atr(entry, atr_val)
-                best = entry
-                trailing = stop
-                qty = q
-                partial_done = False
+        if qty == 0 and sig_mask[i]:
+            notional = cash * position_pct
+            px = _apply_slippage(price, slippage_bps, True)
+            q = notional / max(px, 1e-12)
+            fee = _fee_usd(notional, taker_fee)
+            cash -= notional + fee
+            entry = px
+            atr_val = atr_v[i]
+            stop, tp = _stops_from_atr(entry, atr_val, stop_mult, tp_mult)
+            best = entry
+            trailing = stop
+            qty = q
+            partial_done = False
+
+        equity[i - start] = cash + qty * price
+
+    return equity, wins, exits
+
+
+@dataclass
+class BacktestReport:
+    pnl: float
+    win_rate: float
+    max_dd: float
+    sharpe: float
+    trades: int
+
+
+def run_backtest(
+    df15: pd.DataFrame,
+    settings,
+    risk: RiskManager,
+    start_balance: float = 10000.0,
+) -> BacktestReport:
+    close = df15["close"].to_numpy(np.float64)
+    ef15, es15, r15, a15, up30, n30, up1h, n1h = _fused_indicators(
+        df15.index.as_unit("ns").asi8,
+        df15["high"].to_numpy(np.float64),
+        df15["low"].to_numpy(np.float64),
+        close,
+        int(settings.EMA_FAST),
+        int(settings.EMA_SLOW),
+        int(settings.RSI_PERIOD),
+        int(settings.ATR_PERIOD),
+    )
+    n15 = np.arange(1, len(df15) + 1)
+    warm = warmup_ok(n15, n30, n1h, settings.EMA_SLOW, settings.RSI_PERIOD, settings.ATR_PERIOD)
+    sig_mask = warm & long_entry_mask(close, ef15, es15, r15, a15, up30, up1h, settings.RSI_LONG_MIN)
 
-        equity.append(cash + qty * price)
+    cfg = (
+        float(settings.POSITION_PCT),
+        float(risk.stop_atr_mult),
+        float(risk.tp_atr_mult),
+        float(settings.PARTIAL_TP_PCT),
+        float(risk.slippage_bps),
+        float(risk.taker_fee),
+        int(settings.TRAILING_ENABLED),
+    )
+    simulate = _simulate_aot if _simulate_aot is not None else _simulate
+    equity, wins, exits = simulate(
+        np.ascontiguousarray(close), a15, sig_mask, _START_BAR, float(start_balance), cfg
+    )
 
-    eq = pd.Series(equity, index=df15.index[300:])
-    rets = eq.pct_change().fillna(0.0)
-    pnl = float(eq.iloc[-1] - start_balance) if len(eq) else 0.0
+    pnl = float(equity[-1] - start_balance) if len(equity) else 0.0
     wr = (wins / exits) if exits > 0 else 0.0
-    mdd = _max_drawdown(eq)
-    sh = _sharpe(rets, periods_per_year=365 * 24 * 4)  # 15m bars
+    mdd, sh = _metrics(equity, 365 * 24 * 4)  # 15m bars
     return BacktestReport(pnl=pnl, win_rate=wr, max_dd=mdd, sharpe=sh, trades=exits)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import os
 from dataclasses import dataclass
 from dotenv import load_dotenv
@@ -7,14 +8,17 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+_TRUE = frozenset(("1", "true", "yes", "y", "on"))
+
+
 def _get_bool(key: str, default: bool) -> bool:
     v = os.getenv(key)
     if v is None:
         return default
-    return v.strip().lower() in ("1", "true", "yes", "y", "on")
+    return v.strip().lower() in _TRUE
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Settings:
     # Exchanges
     EXCHANGE: str = os.getenv("EXCHANGE", "binance").strip().lower()  # binance | bybit
@@ -76,3 +80,13 @@ class Settings:
 
     # Backtest
     BACKTEST_START_BALANCE: float = float(os.getenv("BACKTEST_START_BALANCE", "10000"))
+    # CLI: RUN_BACKTEST=1 BACKTEST_SYMBOL=BTCUSDT BACKTEST_DAYS=120
+    RUN_BACKTEST: bool = (os.getenv("RUN_BACKTEST") or "").strip() == "1"
+    BACKTEST_SYMBOL: str = os.getenv("BACKTEST_SYMBOL", "BTCUSDT").strip().upper()
+    BACKTEST_DAYS: int = int(os.getenv("BACKTEST_DAYS", "90"))
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    # env is parsed once at import (the field defaults); one shared frozen instance
+    return Settings()
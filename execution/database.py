@@ -1,13 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import aiosqlite
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Optional
 import json
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
 
-@dataclass(frozen=True)
+log = logging.getLogger("database")
+
+_INSERT_SQL = """
+INSERT INTO trades(id, exchange, symbol, side, qty, entry_price, exit_price, entry_time, exit_time, pnl_usd, fee_usd, meta_json)
+VALUES(?,?,?,?,?,?,?,?,?,?,?,?);
+"""
+_CLOSE_SQL = """
+UPDATE trades
+SET exit_price=?, exit_time=?, pnl_usd=?, fee_usd=fee_usd+?
+WHERE id=?;
+"""
+
+
+@dataclass(frozen=True, slots=True)
 class TradeRow:
     id: int
     exchange: str
@@ -24,11 +43,51 @@ class TradeRow:
 
 
 class TradeDB:
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self, path: str, batch_size: int = 200, flush_interval_s: float = 0.25, retry_delay_s: float = 1.0
+    ) -> None:
         self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.retry_delay_s = retry_delay_s
+        self._db: Optional[aiosqlite.Connection] = None
+        # SQLite allows a single writer; serialize our writes on the shared connection
+        self._lock = asyncio.Lock()
+        # pending ("insert" | "close", params) in call order, drained by _writer
+        self._pending: asyncio.Queue[tuple[str, tuple[Any, ...]]] = asyncio.Queue(maxsize=10_000)
+        self._writer_task: Optional[asyncio.Task[None]] = None
+        # rows of a failed batch, retried ahead of new ones; _error is raised by flush()
+        self._carry: list[tuple[str, tuple[Any, ...]]] = []
+        self._error: Optional[Exception] = None
+        self._next_id = 0
+
+    async def connect(self) -> aiosqlite.Connection:
+        if self._db is None:
+            db = await aiosqlite.connect(self.path)
+            await db.execute("PRAGMA journal_mode=WAL;")
+            await db.execute("PRAGMA synchronous=NORMAL;")
+            await db.execute("PRAGMA temp_store=MEMORY;")
+            self._db = db
+        return self._db
+
+    async def close(self) -> None:
+        try:
+            await self.flush()
+        finally:
+            if self._writer_task is not None:
+                self._writer_task.cancel()
+                try:
+                    await self._writer_task
+                except asyncio.CancelledError:
+                    pass
+                self._writer_task = None
+            if self._db is not None:
+                await self._db.close()
+                self._db = None
 
     async def init(self) -> None:
-        async with aiosqlite.connect(self.path) as db:
+        async with self._lock:
+            db = await self.connect()
             await db.execute(
                 """
                 CREATE TABLE IF NOT EXISTS trades (
@@ -51,10 +110,88 @@ class TradeDB:
             await db.execute("CREATE INDEX IF NOT EXISTS idx_trades_exchange ON trades(exchange);")
             await db.commit()
 
+            # ids are handed out before the row is written, so start past anything
+            # AUTOINCREMENT has already issued
+            cur = await db.execute(
+                """
+                SELECT MAX(
+                    COALESCE((SELECT MAX(id) FROM trades), 0),
+                    COALESCE((SELECT seq FROM sqlite_sequence WHERE name='trades'), 0)
+                );
+                """
+            )
+            row = await cur.fetchone()
+            self._next_id = int(row[0]) + 1 if row else 1
+
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer())
+
+    async def flush(self) -> None:
+        if self._writer_task is not None:
+            await self._pending.join()
+        if self._error is not None:
+            raise RuntimeError(f"{len(self._carry)} trade rows not yet written") from self._error
+
+    async def _writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch, self._carry = self._carry, []
+            taken = 0
+            if not batch:
+                batch.append(await self._pending.get())
+                taken = 1
+            deadline = loop.time() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                    taken += 1
+                except asyncio.TimeoutError:
+                    break
+            failed = False
+            try:
+                await self._write_batch(batch)
+                self._error = None
+            except Exception as e:
+                # keep the rows (ids were already handed out) and retry them first
+                log.warning("trade_batch_write_failed", extra={"rows": len(batch), "err": str(e)})
+                self._carry = batch
+                self._error = e
+                failed = True
+            finally:
+                for _ in range(taken):
+                    self._pending.task_done()
+            if failed:
+                await asyncio.sleep(self.retry_delay_s)
+
+    async def _write_batch(self, batch: list[tuple[str, tuple[Any, ...]]]) -> None:
+        # inserts first: a close in the same batch may refer to a row inserted in it
+        inserts = [params for kind, params in batch if kind == "insert"]
+        closes = [params for kind, params in batch if kind == "close"]
+        async with self._lock:
+            db = await self.connect()
+            try:
+                if inserts:
+                    await db.executemany(_INSERT_SQL, inserts)
+                if closes:
+                    await db.executemany(_CLOSE_SQL, closes)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
     @staticmethod
     def _now() -> str:
         return datetime.now(timezone.utc).isoformat()
 
+    @staticmethod
+    def _meta_json(meta: dict[str, Any]) -> str:
+        if orjson is not None:
+            return orjson.dumps(meta, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        return json.dumps(meta, ensure_ascii=False)
+
     async def insert_entry(
         self,
         exchange: str,
@@ -64,13 +201,15 @@ class TradeDB:
         fee_usd: float,
         meta: dict[str, Any],
     ) -> int:
-        async with aiosqlite.connect(self.path) as db:
-            cur = await db.execute(
-                """
-                INSERT INTO trades(exchange, symbol, side, qty, entry_price, exit_price, entry_time, exit_time, pnl_usd, fee_usd, meta_json)
-                VALUES(?,?,?,?,?,?,?,?,?,?,?);
-                """,
+        if self._writer_task is None:
+            raise RuntimeError("TradeDB.init() must be awaited before writing")
+        trade_id = self._next_id
+        self._next_id += 1
+        await self._pending.put(
+            (
+                "insert",
                 (
+                    trade_id,
                     exchange,
                     symbol,
                     "BUY",
@@ -81,20 +220,13 @@ class TradeDB:
                     None,
                     None,
                     fee_usd,
-                    json.dumps(meta, ensure_ascii=False),
+                    self._meta_json(meta),
                 ),
             )
-            await db.commit()
-            return int(cur.lastrowid)
+        )
+        return trade_id
 
     async def close_trade(self, trade_id: int, exit_price: float, pnl_usd: float, fee_usd_add: float) -> None:
-        async with aiosqlite.connect(self.path) as db:
-            await db.execute(
-                """
-                UPDATE trades
-                SET exit_price=?, exit_time=?, pnl_usd=?, fee_usd=fee_usd+?
-                WHERE id=?;
-                """,
-                (exit_price, self._now(), pnl_usd, fee_usd_add, trade_id),
-            )
-            await db.commit()
+        if self._writer_task is None:
+            raise RuntimeError("TradeDB.init() must be awaited before writing")
+        await self._pending.put(("close", (exit_price, self._now(), pnl_usd, fee_usd_add, trade_id)))
@@ -1,17 +1,34 @@
-import pandas as pd
-import time
+import os
+import asyncio
 import logging
+import openpyxl
 from dataclasses import dataclass
 from typing import Optional
+from watchdog.events import (
+    EVENT_TYPE_CLOSED,
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+    FileSystemEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers import Observer
+
+try:
+    import uvloop
+except ImportError:  # stdlib event loop fallback
+    uvloop = None
 
 EXCEL_PATH = "DYZEN_CAPITAL_OS_AI_LIVE_CORE_READY.xlsx"
 SHEET_NAME = "PYTHON_BRIDGE"
-POLL_INTERVAL = 5
+DEBOUNCE_S = 0.2
 
 MIN_CONFIDENCE = 0.55
 MIN_TREND = 0.5
 MIN_VOLUME = 0.4
 REQUIRE_STRUCTURE = 1
+# frozen at import: (confidence, trend, volume, structure)
+_THR = (MIN_CONFIDENCE, MIN_TREND, MIN_VOLUME, REQUIRE_STRUCTURE)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,7 +36,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger("excel_bridge")
 
-@dataclass
+@dataclass(slots=True)
 class ExcelSignal:
     symbol: str
     confidence: float
@@ -29,36 +46,55 @@ class ExcelSignal:
     structure_ok: int
 
     def is_valid_long(self) -> bool:
+        # structure_ok is the gate that fails most often, so it short-circuits first
+        thr = _THR
         return (
-            self.confidence >= MIN_CONFIDENCE
-            and self.trend_strength >= MIN_TREND
-            and self.volume_score >= MIN_VOLUME
-            and self.structure_ok == REQUIRE_STRUCTURE
+            self.structure_ok == thr[3]
+            and self.confidence >= thr[0]
+            and self.trend_strength >= thr[1]
+            and self.volume_score >= thr[2]
         )
 
 class ExcelCommandBridge:
     def __init__(self, path: str):
         self.path = path
+        self._mtime_ns = 0
+        self._last: Optional[ExcelSignal] = None
 
-    def _load_sheet(self) -> pd.DataFrame:
-        return pd.read_excel(self.path, sheet_name=SHEET_NAME)
-
-    def _to_dict(self, df: pd.DataFrame) -> dict:
-        return dict(zip(df["field"], df["value"]))
+    def _load_sheet(self) -> dict:
+        # read_only streams the sheet XML and skips styles; we only need field -> value
+        wb = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            rows = wb[SHEET_NAME].iter_rows(values_only=True)
+            header = next(rows, ())
+            fi, vi = header.index("field"), header.index("value")
+            return {r[fi]: r[vi] for r in rows if r[fi] is not None}
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _get(data: dict, key: str, default):
+        v = data.get(key)
+        return default if v is None else v
 
     def read_signal(self) -> Optional[ExcelSignal]:
         try:
-            df = self._load_sheet()
-            data = self._to_dict(df)
-
-            return ExcelSignal(
-                symbol=str(data.get("symbol_name_input", "BTCUSDT")).replace("/", ""),
-                confidence=float(data.get("confidence_score_input", 0)),
-                volatility_regime=float(data.get("volatility_regime_input", 0)),
-                volume_score=float(data.get("volume_score_input", 0)),
-                trend_strength=float(data.get("trend_strength_input", 0)),
-                structure_ok=int(data.get("structure_ok_input", 0)),
+            mtime_ns = os.stat(self.path).st_mtime_ns
+            if mtime_ns == self._mtime_ns:
+                return self._last
+
+            data = self._load_sheet()
+            signal = ExcelSignal(
+                symbol=str(self._get(data, "symbol_name_input", "BTCUSDT")).replace("/", ""),
+                confidence=float(self._get(data, "confidence_score_input", 0)),
+                volatility_regime=float(self._get(data, "volatility_regime_input", 0)),
+                volume_score=float(self._get(data, "volume_score_input", 0)),
+                trend_strength=float(self._get(data, "trend_strength_input", 0)),
+                structure_ok=int(self._get(data, "structure_ok_input", 0)),
             )
+            self._mtime_ns = mtime_ns
+            self._last = signal
+            return signal
         except Exception as e:
             logger.exception(f"Excel read failed: {e}")
             return None
@@ -66,8 +102,10 @@ class ExcelCommandBridge:
 class SignalEngine:
     def process(self, signal: ExcelSignal) -> None:
         logger.info(
-            f"Signal received | {signal.symbol} | "
-            f"conf={signal.confidence:.2f} trend={signal.trend_strength:.2f}"
+            "Signal received | %s | conf=%.2f trend=%.2f",
+            signal.symbol,
+            signal.confidence,
+            signal.trend_strength,
         )
 
         if signal.is_valid_long():
@@ -79,16 +117,62 @@ class SignalEngine:
         logger.warning(f"LONG SIGNAL TRIGGERED: {signal.symbol}")
         # integrate your exchange execution here
 
-def main():
-    logger.info("Excel Bridge started...")
-    bridge = ExcelCommandBridge(EXCEL_PATH)
+class ExcelChangeHandler(FileSystemEventHandler):
+    """Forwards changes of one file from the watchdog thread onto an asyncio queue."""
+
+    def __init__(self, path: str, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.path = os.path.abspath(path)
+        self.loop = loop
+        self.queue = queue
+
+    # write-side events only: our own read emits opened/closed_no_write
+    WRITE_EVENTS = frozenset((EVENT_TYPE_MODIFIED, EVENT_TYPE_CREATED, EVENT_TYPE_MOVED, EVENT_TYPE_CLOSED))
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type not in self.WRITE_EVENTS:
+            return
+        # Excel usually saves via a temp file + rename, so also match the move target
+        paths = (event.src_path, getattr(event, "dest_path", ""))
+        if any(p and os.path.abspath(p) == self.path for p in paths):
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+
+async def run(path: str = EXCEL_PATH) -> None:
+    bridge = ExcelCommandBridge(path)
     engine = SignalEngine()
+    changes: asyncio.Queue = asyncio.Queue()
+
+    observer = Observer()
+    observer.schedule(
+        ExcelChangeHandler(path, asyncio.get_running_loop(), changes),
+        os.path.dirname(os.path.abspath(path)),
+        recursive=False,
+    )
+    observer.start()
+    try:
+        changes.put_nowait(None)  # initial read
+        while True:
+            await changes.get()
+            # a single save fires several events; coalesce them
+            while True:
+                try:
+                    await asyncio.wait_for(changes.get(), DEBOUNCE_S)
+                except asyncio.TimeoutError:
+                    break
+
+            signal = bridge.read_signal()
+            if signal:
+                engine.process(signal)
+    finally:
+        observer.stop()
+        observer.join()
 
-    while True:
-        signal = bridge.read_signal()
-        if signal:
-            engine.process(signal)
-        time.sleep(POLL_INTERVAL)
+
+def main():
+    logger.info("Excel Bridge started...")
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(run())
 
 if __name__ == "__main__":
     main()
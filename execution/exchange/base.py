@@ -1,15 +1,50 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import json
 import time
 import random
 from dataclasses import dataclass
 from typing import Any, Optional, Protocol
 
 import aiohttp
+import numpy as np
+from yarl import URL
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
 
-@dataclass(frozen=True)
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps(obj: Any) -> str:
+    # compact either way; aiohttp's json_serialize must return str
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+# columnar candles: open_time/close_time int64 ms, open/high/low/close/volume float64
+OHLCV = dict[str, np.ndarray]
+OHLCV_INT_COLS = ("open_time", "close_time")
+OHLCV_FLOAT_COLS = ("open", "high", "low", "close", "volume")
+
+
+@functools.lru_cache(maxsize=256)
+def base_asset(symbol: str) -> str:
+    # "BTCUSDT" -> "BTC"; symbols are long-lived, so derive each one once
+    return symbol.replace("USDT", "")
+
+
+def empty_ohlcv() -> OHLCV:
+    out: OHLCV = {k: np.empty(0, dtype=np.int64) for k in OHLCV_INT_COLS}
+    out.update({k: np.empty(0, dtype=np.float64) for k in OHLCV_FLOAT_COLS})
+    return out
+
+
+@dataclass(frozen=True, slots=True)
 class OrderResult:
     order_id: str
     symbol: str
@@ -20,10 +55,13 @@ class OrderResult:
 
 
 class Exchange(Protocol):
+    __slots__ = ()  # lets slotted adapters drop the per-instance __dict__
+
     name: str
 
     async def fetch_price(self, symbol: str) -> float: ...
-    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> list[dict[str, Any]]: ...
+    def observe_price(self, symbol: str, price: float) -> None: ...
+    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> OHLCV: ...
     async def fetch_usdt_balance(self) -> float: ...
     async def fetch_base_free(self, symbol: str) -> float: ...
 
@@ -32,30 +70,28 @@ class Exchange(Protocol):
     async def limit_sell_base(self, symbol: str, base_qty: float, price: float) -> OrderResult: ...
     async def cancel_all(self, symbol: str) -> None: ...
 
+    async def close(self) -> None: ...
+
 
 class TokenBucket:
     def __init__(self, rate_per_sec: float, burst: float) -> None:
-        self.rate = rate_per_sec
+        self.rate = max(rate_per_sec, 1e-9)
         self.cap = burst
-        self.tokens = burst
-        self.last = time.monotonic()
-        self.lock = asyncio.Lock()
+        # time at which the bucket is empty again; up to cap/rate in the past means
+        # tokens are banked for a burst. Single-threaded asyncio makes the
+        # read-modify-write in acquire() atomic, so no lock is needed.
+        self._next_free = time.monotonic() - self.cap / self.rate
 
     async def acquire(self, cost: float = 1.0) -> None:
-        async with self.lock:
-            while True:
-                now = time.monotonic()
-                elapsed = now - self.last
-                self.last = now
-                self.tokens = min(self.cap, self.tokens + elapsed * self.rate)
-                if self.tokens >= cost:
-                    self.tokens -= cost
-                    return
-                need = cost - self.tokens
-                await asyncio.sleep(need / max(self.rate, 1e-9))
-
-
-@dataclass(frozen=True)
+        now = time.monotonic()
+        start = max(self._next_free, now - self.cap / self.rate)
+        self._next_free = start + cost / self.rate
+        wait = self._next_free - now
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+@dataclass(frozen=True, slots=True)
 class RetryCfg:
     attempts: int = 6
     base_delay: float = 0.35
@@ -64,9 +100,35 @@ class RetryCfg:
 
 
 class RestClient:
-    def __init__(self, limiter: TokenBucket, retry: RetryCfg | None = None) -> None:
+    def __init__(
+        self,
+        limiter: TokenBucket,
+        retry: RetryCfg | None = None,
+        timeout_s: float = 15.0,
+        connect_timeout_s: float = 2.0,
+    ) -> None:
         self.limiter = limiter
         self.retry = retry or RetryCfg()
+        self.timeout_s = timeout_s
+        # bounds a fresh TCP/TLS connect so a dead pooled peer fails fast and is retried
+        self.connect_timeout_s = connect_timeout_s
+        self._timeout = aiohttp.ClientTimeout(total=timeout_s, sock_connect=connect_timeout_s)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # created lazily: aiohttp sessions must be built inside the running loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self._timeout,
+                json_serialize=_dumps,
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=75),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def request_json(
         self,
@@ -74,21 +136,31 @@ class RestClient:
         url: str,
         *,
         params: dict[str, Any] | None = None,
+        query: str | None = None,
         headers: dict[str, str] | None = None,
         json_body: dict[str, Any] | None = None,
-        timeout_s: float = 15.0,
+        data: bytes | None = None,
+        timeout_s: float | None = None,
     ) -> Any:
+        # query / data: a pre-encoded querystring / body sent byte-for-byte (signed requests)
+        target: str | URL = URL(f"{url}?{query}", encoded=True) if query is not None else url
         last_exc: Optional[Exception] = None
         for attempt in range(1, self.retry.attempts + 1):
             try:
                 await self.limiter.acquire(1.0)
-                timeout = aiohttp.ClientTimeout(total=timeout_s)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    async with session.request(method, url, params=params, headers=headers, json=json_body) as resp:
-                        data = await resp.json(content_type=None)
-                        if resp.status >= 400:
-                            raise RuntimeError(f"HTTP {resp.status}: {data}")
-                        return data
+                session = self._get_session()
+                # always pass a ClientTimeout: timeout=None would disable the limits entirely
+                timeout = (
+                    aiohttp.ClientTimeout(total=timeout_s, sock_connect=self.connect_timeout_s)
+                    if timeout_s is not None
+                    else self._timeout
+                )
+                async with session.request(method, target, params=params, headers=headers, json=json_body, data=data, timeout=timeout) as resp:
+                    raw = await resp.read()
+                    payload = _loads(raw) if raw.strip() else None
+                    if resp.status >= 400:
+                        raise RuntimeError(f"HTTP {resp.status}: {payload}")
+                    return payload
             except (asyncio.CancelledError, KeyboardInterrupt):
                 raise
             except Exception as e:
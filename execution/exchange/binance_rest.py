@@ -1,15 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import time
 import hmac
 import hashlib
 from typing import Any
+from urllib.parse import urlencode
 
-from execution.exchange.base import Exchange, OrderResult, RestClient, TokenBucket
+import numpy as np
 
-
-def _sign(secret: str, query: str) -> str:
-    return hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+from execution.exchange.base import OHLCV, Exchange, OrderResult, RestClient, TokenBucket, base_asset, empty_ohlcv
 
 
 class BinanceSpot(Exchange):
@@ -20,70 +20,88 @@ class BinanceSpot(Exchange):
         self.key = api_key
         self.secret = api_secret
         self.rest = RestClient(limiter)
+        # keyed once; copy() per request skips the ipad/opad key schedule
+        self._hmac_template = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        # (monotonic fetch time, asset -> free) shared by the balance getters
+        self._account_cache: tuple[float, dict[str, float]] = (float("-inf"), {})
+        self._account_ttl = 1.0
+        self._account_lock = asyncio.Lock()
+        # bumped by every order; a fetch that raced one must not be cached
+        self._account_gen = 0
+
+    def _sign(self, query: str) -> str:
+        h = self._hmac_template.copy()
+        h.update(query.encode())
+        return h.hexdigest()
 
     def _headers(self) -> dict[str, str]:
         return {"X-MBX-APIKEY": self.key}
 
-    def _signed_params(self, params: dict[str, Any]) -> dict[str, Any]:
-        params = dict(params)
-        params["timestamp"] = int(time.time() * 1000)
-        # Binance expects querystring signature
-        qs = "&".join(f"{k}={params[k]}" for k in sorted(params.keys()))
-        params["signature"] = _sign(self.secret, qs)
-        return params
+    def _signed_query(self, params: dict[str, Any]) -> str:
+        # Binance signs the querystring exactly as sent, so encode once, sign those
+        # bytes and send the same string
+        qs = urlencode({**params, "timestamp": time.time_ns() // 1_000_000})
+        return f"{qs}&signature={self._sign(qs)}"
 
     async def fetch_price(self, symbol: str) -> float:
         data = await self.rest.request_json("GET", f"{self.base_url}/api/v3/ticker/price", params={"symbol": symbol})
         return float(data["price"])
 
-    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> list[dict[str, Any]]:
+    def observe_price(self, symbol: str, price: float) -> None:
+        # market orders are quote-sized (quoteOrderQty), so nothing reads a cached price
+        pass
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> OHLCV:
         data = await self.rest.request_json(
             "GET",
             f"{self.base_url}/api/v3/klines",
             params={"symbol": symbol, "interval": timeframe, "limit": limit},
         )
-        out: list[dict[str, Any]] = []
-        for r in data:
-            out.append(
-                {
-                    "open_time": int(r[0]),
-                    "open": float(r[1]),
-                    "high": float(r[2]),
-                    "low": float(r[3]),
-                    "close": float(r[4]),
-                    "volume": float(r[5]),
-                    "close_time": int(r[6]),
-                }
+        if not data:
+            return empty_ohlcv()
+        # rows are [open_time, "open", "high", "low", "close", "volume", close_time, ...]
+        arr = np.asarray(data, dtype=object)
+        return {
+            "open_time": arr[:, 0].astype(np.int64),
+            "open": arr[:, 1].astype(np.float64),
+            "high": arr[:, 2].astype(np.float64),
+            "low": arr[:, 3].astype(np.float64),
+            "close": arr[:, 4].astype(np.float64),
+            "volume": arr[:, 5].astype(np.float64),
+            "close_time": arr[:, 6].astype(np.int64),
+        }
+
+    async def _get_balances(self) -> dict[str, float]:
+        # the lock makes concurrent callers share one signed /account round-trip
+        async with self._account_lock:
+            ts, balances = self._account_cache
+            if time.monotonic() - ts < self._account_ttl:
+                return balances
+            gen = self._account_gen
+            data = await self.rest.request_json(
+                "GET",
+                f"{self.base_url}/api/v3/account",
+                query=self._signed_query({}),
+                headers=self._headers(),
             )
-        return out
+            balances = {str(b.get("asset")): float(b.get("free", 0.0)) for b in data.get("balances", [])}
+            if gen == self._account_gen:
+                self._account_cache = (time.monotonic(), balances)
+            return balances
+
+    def _invalidate_balances(self) -> None:
+        self._account_gen += 1
+        self._account_cache = (float("-inf"), {})
 
     async def fetch_usdt_balance(self) -> float:
-        data = await self.rest.request_json(
-            "GET",
-            f"{self.base_url}/api/v3/account",
-            params=self._signed_params({}),
-            headers=self._headers(),
-        )
-        for b in data.get("balances", []):
-            if b.get("asset") == "USDT":
-                return float(b.get("free", 0.0))
-        return 0.0
+        return (await self._get_balances()).get("USDT", 0.0)
 
     async def fetch_base_free(self, symbol: str) -> float:
-        base = symbol.replace("USDT", "")
-        data = await self.rest.request_json(
-            "GET",
-            f"{self.base_url}/api/v3/account",
-            params=self._signed_params({}),
-            headers=self._headers(),
-        )
-        for b in data.get("balances", []):
-            if b.get("asset") == base:
-                return float(b.get("free", 0.0))
-        return 0.0
+        base = base_asset(symbol)
+        return (await self._get_balances()).get(base, 0.0)
 
     async def market_buy_quote(self, symbol: str, quote_usdt: float) -> OrderResult:
-        params = self._signed_params(
+        query = self._signed_query(
             {
                 "symbol": symbol,
                 "side": "BUY",
@@ -94,9 +112,10 @@ class BinanceSpot(Exchange):
         data = await self.rest.request_json(
             "POST",
             f"{self.base_url}/api/v3/order",
-            params=params,
+            query=query,
             headers=self._headers(),
         )
+        self._invalidate_balances()
         executed_qty = float(data.get("executedQty", 0.0))
         fills = data.get("fills") or []
         if fills and executed_qty > 0:
@@ -108,7 +127,7 @@ class BinanceSpot(Exchange):
         return OrderResult(str(data.get("orderId")), symbol, "BUY", str(data.get("status")), executed_qty, float(avg))
 
     async def market_sell_base(self, symbol: str, base_qty: float) -> OrderResult:
-        params = self._signed_params(
+        query = self._signed_query(
             {
                 "symbol": symbol,
                 "side": "SELL",
@@ -119,16 +138,17 @@ class BinanceSpot(Exchange):
         data = await self.rest.request_json(
             "POST",
             f"{self.base_url}/api/v3/order",
-            params=params,
+            query=query,
             headers=self._headers(),
         )
+        self._invalidate_balances()
         executed_qty = float(data.get("executedQty", 0.0))
         cqq = float(data.get("cummulativeQuoteQty", 0.0))
         avg = cqq / max(executed_qty, 1e-12)
         return OrderResult(str(data.get("orderId")), symbol, "SELL", str(data.get("status")), executed_qty, float(avg))
 
     async def limit_sell_base(self, symbol: str, base_qty: float, price: float) -> OrderResult:
-        params = self._signed_params(
+        query = self._signed_query(
             {
                 "symbol": symbol,
                 "side": "SELL",
@@ -141,16 +161,21 @@ class BinanceSpot(Exchange):
         data = await self.rest.request_json(
             "POST",
             f"{self.base_url}/api/v3/order",
-            params=params,
+            query=query,
             headers=self._headers(),
         )
+        self._invalidate_balances()
         return OrderResult(str(data.get("orderId")), symbol, "SELL", str(data.get("status")), float(data.get("executedQty", 0.0)), float(data.get("price", price)))
 
     async def cancel_all(self, symbol: str) -> None:
-        params = self._signed_params({"symbol": symbol})
+        query = self._signed_query({"symbol": symbol})
         await self.rest.request_json(
             "DELETE",
             f"{self.base_url}/api/v3/openOrders",
-            params=params,
+            query=query,
             headers=self._headers(),
         )
+        self._invalidate_balances()
+
+    async def close(self) -> None:
+        await self.rest.close()
@@ -7,8 +7,15 @@ from typing import AsyncIterator, Optional
 
 import websockets
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
 
-@dataclass(frozen=True)
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+@dataclass(frozen=True, slots=True)
 class KlineMsg:
     symbol: str
     timeframe: str
@@ -25,25 +32,29 @@ class KlineMsg:
 class BinanceWS:
     def __init__(self, ws_base_url: str) -> None:
         self.ws_base_url = ws_base_url.rstrip("/")
-        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
 
     def stop(self) -> None:
-        self._stop.set()
+        # cancel the task iterating stream_klines; CancelledError ends the stream
+        if self._task is not None:
+            self._task.cancel()
 
     async def stream_klines(self, symbols: list[str], timeframe: str) -> AsyncIterator[KlineMsg]:
         params = [f"{s.lower()}@kline_{timeframe}" for s in symbols]
         sub = {"method": "SUBSCRIBE", "params": params, "id": 1}
 
+        self._task = asyncio.current_task()
         backoff = 0.5
-        while not self._stop.is_set():
+        while True:
             try:
-                async with websockets.connect(self.ws_base_url, ping_interval=20, ping_timeout=20) as ws:
+                # kline frames are small; permessage-deflate only adds zlib work per frame
+                async with websockets.connect(
+                    self.ws_base_url, ping_interval=20, ping_timeout=20, compression=None, max_size=2**20
+                ) as ws:
                     await ws.send(json.dumps(sub))
                     backoff = 0.5
                     async for raw in ws:
-                        if self._stop.is_set():
-                            break
-                        data = json.loads(raw)
+                        data = _loads(raw)
                         if data.get("e") != "kline":
                             continue
                         k = data.get("k") or {}
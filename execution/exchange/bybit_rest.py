@@ -1,19 +1,69 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import time
 import hmac
 import hashlib
-import json
-from typing import Any
 
-from execution.exchange.base import Exchange, OrderResult, RestClient, TokenBucket
+import numpy as np
 
+from execution.exchange.base import OHLCV, Exchange, OrderResult, RestClient, TokenBucket, base_asset, empty_ohlcv
 
-def _hmac_sha256(secret: str, msg: str) -> str:
-    return hmac.new(secret.encode(), msg.encode(), hashlib.sha256).hexdigest()
+
+# bot timeframe -> Bybit v5 kline interval (REST and WS topics)
+_BYBIT_INTERVAL = {
+    "1m": "1",
+    "3m": "3",
+    "5m": "5",
+    "15m": "15",
+    "30m": "30",
+    "1h": "60",
+    "2h": "120",
+    "4h": "240",
+    "6h": "360",
+    "12h": "720",
+    "1d": "D",
+    "1w": "W",
+    "1M": "M",
+}
+
+
+# compact JSON order bodies, assembled directly as the bytes that are signed and sent
+# (symbols are plain ASCII, so no escaping is needed)
+_LIMIT_BODY = (
+    b'{"category":"spot","symbol":"%s","side":"%s","orderType":"Limit",'
+    b'"qty":"%.8f","price":"%.6f","timeInForce":"GTC"}'
+)
+_CANCEL_ALL_BODY = b'{"category":"spot","symbol":"%s"}'
+
+
+@functools.lru_cache(maxsize=256)
+def _market_template(symbol: str, side: str) -> tuple[bytes, bytes]:
+    # per-symbol JSON around the qty field: a market body is prefix + qty + suffix
+    prefix = b'{"category":"spot","symbol":"%s","side":"%s","orderType":"Market","qty":"' % (
+        symbol.encode(),
+        side.encode(),
+    )
+    return prefix, b'"}'
 
 
 class BybitSpot(Exchange):
+    __slots__ = (
+        "base_url",
+        "key",
+        "secret",
+        "rest",
+        "_hmac_template",
+        "_price_cache",
+        "_price_ttl",
+        "_price_locks",
+        "_ws_price",
+        "_ws_price_max_age",
+        "_sign_tail",
+        "_static_headers",
+    )
+
     name = "bybit"
 
     def __init__(self, base_url: str, api_key: str, api_secret: str, limiter: TokenBucket) -> None:
@@ -21,34 +71,69 @@ class BybitSpot(Exchange):
         self.key = api_key
         self.secret = api_secret
         self.rest = RestClient(limiter)
-
-    def _sign_headers(self, method: str, query: str, body_str: str) -> dict[str, str]:
-        ts = str(int(time.time() * 1000))
+        # keyed once; copy() per request skips the ipad/opad key schedule
+        self._hmac_template = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        # symbol -> (monotonic fetch time, lastPrice); coalesces back-to-back ticker reads
+        self._price_cache: dict[str, tuple[float, float]] = {}
+        self._price_ttl = 0.25
+        self._price_locks: dict[str, asyncio.Lock] = {}
+        # symbol -> (monotonic time, last streamed close); fresher than a ticker round-trip
+        self._ws_price: dict[str, tuple[float, float]] = {}
+        self._ws_price_max_age = 2.0
         recv = "5000"
-        payload = ts + self.key + recv + (query if method == "GET" else body_str)
-        sign = _hmac_sha256(self.secret, payload)
-        return {
-            "X-BAPI-API-KEY": self.key,
-            "X-BAPI-TIMESTAMP": ts,
+        self._sign_tail = (api_key + recv).encode()
+        self._static_headers = {
+            "X-BAPI-API-KEY": api_key,
             "X-BAPI-RECV-WINDOW": recv,
-            "X-BAPI-SIGN": sign,
             "Content-Type": "application/json",
         }
 
+    def _sign(self, payload: bytes) -> str:
+        h = self._hmac_template.copy()
+        h.update(payload)
+        return h.hexdigest()
+
+    def _sign_headers(self, method: str, query: str, body: bytes) -> dict[str, str]:
+        # payload = ts + key + recv_window + (query for GET | exact body bytes for POST)
+        ts = str(time.time_ns() // 1_000_000)
+        msg = query.encode() if method == "GET" else body
+        return {
+            **self._static_headers,
+            "X-BAPI-TIMESTAMP": ts,
+            "X-BAPI-SIGN": self._sign(b"".join((ts.encode(), self._sign_tail, msg))),
+        }
+
+    def observe_price(self, symbol: str, price: float) -> None:
+        self._ws_price[symbol] = (time.monotonic(), price)
+
     async def fetch_price(self, symbol: str) -> float:
-        data = await self.rest.request_json(
-            "GET",
-            f"{self.base_url}/v5/market/tickers",
-            params={"category": "spot", "symbol": symbol},
-        )
-        return float(data["result"]["list"][0]["lastPrice"])
-
-    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> list[dict[str, Any]]:
-        if timeframe.endswith("m"):
-            interval = timeframe[:-1]
-        elif timeframe.endswith("h"):
-            interval = str(int(timeframe[:-1]) * 60)
-        else:
+        ws = self._ws_price.get(symbol)
+        if ws is not None and time.monotonic() - ws[0] < self._ws_price_max_age:
+            return ws[1]
+        # the per-symbol lock makes concurrent callers share one ticker round-trip
+        lock = self._price_locks.get(symbol)
+        if lock is None:
+            lock = self._price_locks[symbol] = asyncio.Lock()
+        async with lock:
+            ent = self._price_cache.get(symbol)
+            if ent is not None and time.monotonic() - ent[0] < self._price_ttl:
+                return ent[1]
+            data = await self.rest.request_json(
+                "GET",
+                f"{self.base_url}/v5/market/tickers",
+                params={"category": "spot", "symbol": symbol},
+            )
+            price = float(data["result"]["list"][0]["lastPrice"])
+            self._price_cache[symbol] = (time.monotonic(), price)
+            return price
+
+    def invalidate_price(self, symbol: str) -> None:
+        self._price_cache.pop(symbol, None)
+        self._ws_price.pop(symbol, None)
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> OHLCV:
+        interval = _BYBIT_INTERVAL.get(timeframe)
+        if interval is None:
             raise ValueError("Unsupported timeframe for Bybit in this bot")
 
         data = await self.rest.request_json(
@@ -56,91 +141,83 @@ class BybitSpot(Exchange):
             f"{self.base_url}/v5/market/kline",
             params={"category": "spot", "symbol": symbol, "interval": interval, "limit": str(limit)},
         )
-        rows = list(reversed(data["result"]["list"]))  # oldest first
-        out: list[dict[str, Any]] = []
-        for r in rows:
-            out.append(
-                {
-                    "open_time": int(r[0]),
-                    "open": float(r[1]),
-                    "high": float(r[2]),
-                    "low": float(r[3]),
-                    "close": float(r[4]),
-                    "volume": float(r[5]),
-                    "close_time": int(r[0]) + 1,
-                }
-            )
-        return out
+        rows = data["result"]["list"][::-1]  # oldest first
+        if not rows:
+            return empty_ohlcv()
+        # rows are ["start", "open", "high", "low", "close", "volume", "turnover"]
+        arr = np.asarray(rows, dtype=object)
+        open_time = arr[:, 0].astype(np.int64)
+        return {
+            "open_time": open_time,
+            "open": arr[:, 1].astype(np.float64),
+            "high": arr[:, 2].astype(np.float64),
+            "low": arr[:, 3].astype(np.float64),
+            "close": arr[:, 4].astype(np.float64),
+            "volume": arr[:, 5].astype(np.float64),
+            "close_time": open_time + 1,
+        }
 
-    async def fetch_usdt_balance(self) -> float:
+    async def fetch_balances(self, coins: tuple[str, ...]) -> dict[str, float]:
+        # one signed wallet-balance round-trip for all requested coins; missing coins read 0.0
         query = "accountType=UNIFIED"
-        headers = self._sign_headers("GET", query, "")
+        headers = self._sign_headers("GET", query, b"")
         data = await self.rest.request_json(
             "GET",
             f"{self.base_url}/v5/account/wallet-balance",
             params={"accountType": "UNIFIED"},
             headers=headers,
         )
-        for acc in data["result"].get("list", []):
-            for c in acc.get("coin", []):
-                if c.get("coin") == "USDT":
-                    return float(c.get("availableToWithdraw", 0.0))
-        return 0.0
+        wanted = set(coins)
+        out: dict[str, float] = {}
+        for acc in data["result"].get("list", ()):
+            for c in acc.get("coin", ()):
+                name = c.get("coin")
+                if name in wanted and name not in out:
+                    out[name] = float(c.get("availableToWithdraw", 0.0))
+            if len(out) == len(wanted):
+                break
+        return {k: out.get(k, 0.0) for k in coins}
+
+    async def fetch_usdt_balance(self) -> float:
+        return (await self.fetch_balances(("USDT",)))["USDT"]
 
     async def fetch_base_free(self, symbol: str) -> float:
-        base = symbol.replace("USDT", "")
-        query = "accountType=UNIFIED"
-        headers = self._sign_headers("GET", query, "")
-        data = await self.rest.request_json(
-            "GET",
-            f"{self.base_url}/v5/account/wallet-balance",
-            params={"accountType": "UNIFIED"},
-            headers=headers,
-        )
-        for acc in data["result"].get("list", []):
-            for c in acc.get("coin", []):
-                if c.get("coin") == base:
-                    return float(c.get("availableToWithdraw", 0.0))
-        return 0.0
+        base = base_asset(symbol)
+        return (await self.fetch_balances((base,)))[base]
 
     async def market_buy_quote(self, symbol: str, quote_usdt: float) -> OrderResult:
         # Bybit spot market expects qty in base; approximate using lastPrice
         price = await self.fetch_price(symbol)
         base_qty = quote_usdt / max(price, 1e-12)
-        body = {"category": "spot", "symbol": symbol, "side": "Buy", "orderType": "Market", "qty": f"{base_qty:.8f}"}
-        body_str = json.dumps(body, separators=(",", ":"))
-        headers = self._sign_headers("POST", "", body_str)
-        data = await self.rest.request_json("POST", f"{self.base_url}/v5/order/create", headers=headers, json_body=body)
+        prefix, suffix = _market_template(symbol, "Buy")
+        body_bytes = prefix + b"%.8f" % base_qty + suffix
+        headers = self._sign_headers("POST", "", body_bytes)
+        data = await self.rest.request_json("POST", f"{self.base_url}/v5/order/create", headers=headers, data=body_bytes)
+        self.invalidate_price(symbol)
         order_id = str(data["result"]["orderId"])
         return OrderResult(order_id, symbol, "BUY", "NEW", float(base_qty), float(price))
 
     async def market_sell_base(self, symbol: str, base_qty: float) -> OrderResult:
         price = await self.fetch_price(symbol)
-        body = {"category": "spot", "symbol": symbol, "side": "Sell", "orderType": "Market", "qty": f"{base_qty:.8f}"}
-        body_str = json.dumps(body, separators=(",", ":"))
-        headers = self._sign_headers("POST", "", body_str)
-        data = await self.rest.request_json("POST", f"{self.base_url}/v5/order/create", headers=headers, json_body=body)
+        prefix, suffix = _market_template(symbol, "Sell")
+        body_bytes = prefix + b"%.8f" % base_qty + suffix
+        headers = self._sign_headers("POST", "", body_bytes)
+        data = await self.rest.request_json("POST", f"{self.base_url}/v5/order/create", headers=headers, data=body_bytes)
+        self.invalidate_price(symbol)
         order_id = str(data["result"]["orderId"])
         return OrderResult(order_id, symbol, "SELL", "NEW", float(base_qty), float(price))
 
     async def limit_sell_base(self, symbol: str, base_qty: float, price: float) -> OrderResult:
-        body = {
-            "category": "spot",
-            "symbol": symbol,
-            "side": "Sell",
-            "orderType": "Limit",
-            "qty": f"{base_qty:.8f}",
-            "price": f"{price:.6f}",
-            "timeInForce": "GTC",
-        }
-        body_str = json.dumps(body, separators=(",", ":"))
-        headers = self._sign_headers("POST", "", body_str)
-        data = await self.rest.request_json("POST", f"{self.base_url}/v5/order/create", headers=headers, json_body=body)
+        body_bytes = _LIMIT_BODY % (symbol.encode(), b"Sell", base_qty, price)
+        headers = self._sign_headers("POST", "", body_bytes)
+        data = await self.rest.request_json("POST", f"{self.base_url}/v5/order/create", headers=headers, data=body_bytes)
         order_id = str(data["result"]["orderId"])
         return OrderResult(order_id, symbol, "SELL", "NEW", 0.0, float(price))
 
     async def cancel_all(self, symbol: str) -> None:
-        body = {"category": "spot", "symbol": symbol}
-        body_str = json.dumps(body, separators=(",", ":"))
-        headers = self._sign_headers("POST", "", body_str)
-        await self.rest.request_json("POST", f"{self.base_url}/v5/order/cancel-all", headers=headers, json_body=body)
+        body_bytes = _CANCEL_ALL_BODY % symbol.encode()
+        headers = self._sign_headers("POST", "", body_bytes)
+        await self.rest.request_json("POST", f"{self.base_url}/v5/order/cancel-all", headers=headers, data=body_bytes)
+
+    async def close(self) -> None:
+        await self.rest.close()
@@ -2,13 +2,25 @@ from __future__ import annotations
 
 import asyncio
 import json
+import random
 from dataclasses import dataclass
 from typing import AsyncIterator
 
-import websockets
+from websockets.asyncio.client import connect
 
+from execution.exchange.bybit_rest import _BYBIT_INTERVAL
 
-@dataclass(frozen=True)
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+_SUB_ARGS_MAX = 10
+
+
+@dataclass(frozen=True, slots=True)
 class KlineMsg:
     symbol: str
     timeframe: str
@@ -23,6 +35,8 @@ class KlineMsg:
 
 
 class BybitWS:
+    __slots__ = ("ws_url", "_stop")
+
     def __init__(self, ws_url: str) -> None:
         self.ws_url = ws_url
         self._stop = asyncio.Event()
@@ -32,49 +46,67 @@ class BybitWS:
 
     async def stream_klines(self, symbols: list[str], timeframe: str) -> AsyncIterator[KlineMsg]:
         # topic: kline.{interval}.{symbol} where interval in minutes (15/30/60...)
-        if timeframe.endswith("m"):
-            interval = timeframe[:-1]
-        elif timeframe.endswith("h"):
-            interval = str(int(timeframe[:-1]) * 60)
-        else:
+        interval = _BYBIT_INTERVAL.get(timeframe)
+        if interval is None:
             raise ValueError("Unsupported timeframe")
 
-        sub = {"op": "subscribe", "args": [f"kline.{interval}.{s}" for s in symbols]}
+        sym_by_topic = {f"kline.{interval}.{s}": s for s in symbols}
+        # serialized once, in chunks of Bybit's 10-args-per-op cap, and resent on reconnect
+        topics = list(sym_by_topic)
+        sub_frames = [
+            json.dumps({"op": "subscribe", "args": topics[i : i + _SUB_ARGS_MAX]})
+            for i in range(0, len(topics), _SUB_ARGS_MAX)
+        ]
+        # hot-loop callables bound to locals (LOAD_FAST instead of a globals/builtins probe)
+        loads, topic_sym = _loads, sym_by_topic.get
+        _float, _int, _bool, _msg = float, int, bool, KlineMsg
 
-        backoff = 0.5
+        backoff = 0.1
         while not self._stop.is_set():
             try:
-                async with websockets.connect(self.ws_url, ping_interval=20, ping_timeout=20) as ws:
-                    await ws.send(json.dumps(sub))
-                    backoff = 0.5
-                    async for raw in ws:
-                        if self._stop.is_set():
-                            break
-                        data = json.loads(raw)
-                        topic = data.get("topic")
-                        if not topic or not str(topic).startswith("kline."):
+                # kline frames are a few hundred bytes; permessage-deflate only adds zlib work
+                # per frame, and small buffers are enough to absorb bursts
+                async with connect(
+                    self.ws_url,
+                    ping_interval=20,
+                    ping_timeout=20,
+                    compression=None,
+                    max_size=2**20,
+                    write_limit=2**16,
+                ) as ws:
+                    for frame in sub_frames:
+                        await ws.send(frame)
+                    backoff = 0.1
+                    recv, stopped = ws.recv, self._stop.is_set
+                    while not stopped():
+                        # raw frame bytes: orjson parses them without the UTF-8 decode to str;
+                        # a closed connection raises and goes through the reconnect path
+                        data = loads(await recv(decode=False))
+                        get = data.get
+                        # only our kline topics map to a symbol; acks/pongs have no topic
+                        sym = topic_sym(get("topic"))
+                        if sym is None:
                             continue
-                        items = data.get("data")
-                        if not items or not isinstance(items, list):
+                        items = get("data")
+                        if not items:
                             continue
-                        item = items[-1]
-                        parts = str(topic).split(".")
-                        sym = parts[2]
+                        item_get = items[-1].get
                         # confirm flag means candle closed
-                        yield KlineMsg(
+                        yield _msg(
                             symbol=sym,
                             timeframe=timeframe,
-                            is_closed=bool(item.get("confirm", False)),
-                            o=float(item.get("open")),
-                            h=float(item.get("high")),
-                            l=float(item.get("low")),
-                            c=float(item.get("close")),
-                            v=float(item.get("volume")),
-                            start_ms=int(item.get("start")),
-                            end_ms=int(item.get("end")),
+                            is_closed=_bool(item_get("confirm", False)),
+                            o=_float(item_get("open")),
+                            h=_float(item_get("high")),
+                            l=_float(item_get("low")),
+                            c=_float(item_get("close")),
+                            v=_float(item_get("volume")),
+                            start_ms=_int(item_get("start")),
+                            end_ms=_int(item_get("end")),
                         )
             except (asyncio.CancelledError, KeyboardInterrupt):
                 raise
             except Exception:
-                await asyncio.sleep(backoff)
+                # jittered so a fleet-wide disconnect doesn't reconnect in lockstep
+                await asyncio.sleep(backoff * (0.5 + random.random()))
                 backoff = min(10.0, backoff * 2)
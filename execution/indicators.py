@@ -2,27 +2,118 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+from numba import njit
+from numba.types import Array, b1, f8, i8
+
+
+# Entry-point kernels carry explicit signatures: they compile (or load from the on-disk
+# cache) when this module is imported, not on the first live signal. Inputs must be
+# contiguous float64, either writable (ring buffers) or read-only (pandas copy-on-write
+# views); the wrappers below make sure of the layout.
+_F8 = Array(f8, 1, "C")
+_IN = (_F8, Array(f8, 1, "C", readonly=True))
+
+
+@njit(cache=True)
+def _ewm_coeffs(alpha: float) -> tuple[float, float, float]:
+    # (alpha, 1 - alpha, normaliser), computed once per series instead of per step;
+    # the normaliser is kept because (1 - alpha) + alpha is not always exactly 1.0
+    old = 1.0 - alpha
+    return alpha, old, old + alpha
+
+
+@njit(cache=True)
+def _ewm_step(w: float, cur: float, k: tuple[float, float, float]) -> float:
+    # one step of pandas' ewm(adjust=False).mean(), bit-for-bit (no interior NaNs)
+    if w != w:
+        return cur
+    if w != cur:
+        alpha, old, norm = k
+        w = (old * w + alpha * cur) / norm
+    return w
+
+
+@njit(cache=True)
+def _rsi_value(avg_gain: float, avg_loss: float) -> float:
+    # a zero (or not yet defined) average loss reads 50, as the pandas
+    # replace(0, nan) -> fillna(50) chain did; no division is attempted
+    if avg_loss > 0.0:
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return 50.0
+
+
+@njit([_F8(a, f8) for a in _IN], cache=True)
+def _ema_kernel(x: np.ndarray, alpha: float) -> np.ndarray:
+    n = x.shape[0]
+    out = np.empty(n)
+    k = _ewm_coeffs(alpha)
+    w = np.nan
+    for i in range(n):
+        w = _ewm_step(w, x[i], k)
+        out[i] = w
+    return out
+
+
+@njit([b1(a, i8, i8) for a in _IN], cache=True)
+def _trend_up(c: np.ndarray, fast: int, slow: int) -> bool:
+    # last EMA(fast) > last EMA(slow), both in one pass without materialising either series
+    kf = _ewm_coeffs(2.0 / (1.0 + fast))
+    ks = _ewm_coeffs(2.0 / (1.0 + slow))
+    ef = es = np.nan
+    for i in range(c.shape[0]):
+        ef = _ewm_step(ef, c[i], kf)
+        es = _ewm_step(es, c[i], ks)
+    return ef > es
+
+
+@njit([_F8(a, i8) for a in _IN], cache=True)
+def _rsi_kernel(c: np.ndarray, period: int) -> np.ndarray:
+    # diff -> clip -> two Wilder EMAs -> RSI in one pass
+    n = c.shape[0]
+    out = np.empty(n)
+    k = _ewm_coeffs(1.0 / period)
+    g = lo = np.nan
+    for i in range(n):
+        if i > 0:
+            d = c[i] - c[i - 1]
+            g = _ewm_step(g, max(d, 0.0), k)
+            lo = _ewm_step(lo, max(-d, 0.0), k)
+        out[i] = _rsi_value(g, lo)
+    return out
+
+
+@njit([_F8(a, a, a, i8) for a in _IN], cache=True)
+def _atr_kernel(h: np.ndarray, l: np.ndarray, c: np.ndarray, period: int) -> np.ndarray:
+    # true range (high - low on the first bar) streamed straight into the Wilder EMA
+    n = c.shape[0]
+    out = np.empty(n)
+    k = _ewm_coeffs(1.0 / period)
+    w = np.nan
+    for i in range(n):
+        tr = abs(h[i] - l[i])
+        if i > 0:
+            pc = c[i - 1]
+            tr = max(tr, abs(h[i] - pc), abs(l[i] - pc))
+        w = _ewm_step(w, tr, k)
+        out[i] = w
+    return out
 
 
 def ema(series: pd.Series, period: int) -> pd.Series:
-    return series.ewm(span=period, adjust=False).mean()
+    out = _ema_kernel(np.ascontiguousarray(series.to_numpy(dtype=np.float64)), 2.0 / (1.0 + period))
+    return pd.Series(out, index=series.index, name=series.name)
 
 
 def rsi(close: pd.Series, period: int = 14) -> pd.Series:
-    delta = close.diff()
-    gain = delta.clip(lower=0)
-    loss = (-delta).clip(lower=0)
-    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
-    rs = avg_gain / (avg_loss.replace(0, np.nan))
-    out = 100 - (100 / (1 + rs))
-    return out.fillna(50.0)
+    out = _rsi_kernel(np.ascontiguousarray(close.to_numpy(dtype=np.float64)), period)
+    return pd.Series(out, index=close.index, name=close.name)
 
 
 def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    prev_close = close.shift(1)
-    tr1 = (high - low).abs()
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    return tr.ewm(alpha=1 / period, adjust=False).mean()
+    out = _atr_kernel(
+        np.ascontiguousarray(high.to_numpy(dtype=np.float64)),
+        np.ascontiguousarray(low.to_numpy(dtype=np.float64)),
+        np.ascontiguousarray(close.to_numpy(dtype=np.float64)),
+        period,
+    )
+    return pd.Series(out, index=close.index)
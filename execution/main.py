@@ -3,11 +3,14 @@ from __future__ import annotations
 import asyncio
 import logging
 from datetime import datetime, timezone
+from typing import Optional
 
-import numpy as np
-import pandas as pd
+try:
+    import uvloop
+except ImportError:  # stdlib event loop fallback
+    uvloop = None
 
-from execution.config import Settings
+from execution.config import Settings, get_settings
 from execution.database import TradeDB
 from execution.exchange.base import TokenBucket
 from execution.exchange.binance_rest import BinanceSpot
@@ -15,18 +18,19 @@ from execution.exchange.bybit_rest import BybitSpot
 from execution.exchange.binance_ws import BinanceWS
 from execution.exchange.bybit_ws import BybitWS
 from execution.ml.signal_model import MLSignalFilter
+from execution.ohlcv_ring import OHLCVBuckets, OHLCVRing, candles_frame
 from execution.portfolio import Portfolio, Position
 from execution.risk.manager import RiskManager
 from execution.smart_router import SmartRouter
-from execution.strategy.orderbook_alpha import compute_long_signal
-from execution.backtester import run_backtest
+from execution.strategy.orderbook_alpha import Signal, SignalState
+from execution.backtester import exit_step, run_backtest
 
-logging.basicConfig(level=Settings().LOG_LEVEL)
+logging.basicConfig(level=get_settings().LOG_LEVEL)
 log = logging.getLogger("main")
 
 
-def _ms_to_dt(ms: int) -> datetime:
-    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc)
+_HISTORY_BARS = 2000  # 15m bars kept per symbol for the live signal
+_RULE_NS = {"30m": 30 * 60 * 1_000_000_000, "1h": 60 * 60 * 1_000_000_000}
 
 
 class Engine:
@@ -46,7 +50,10 @@ class Engine:
         self.ml = MLSignalFilter(enabled=s.ML_ENABLED, min_proba=s.ML_MIN_PROBA)
         self.router = SmartRouter()
         self._idx: dict[str, int] = {sym: 0 for sym in s.SYMBOLS}
-        self._df15: dict[str, pd.DataFrame] = {}
+        self._bars: dict[str, OHLCVRing] = {}
+        # symbol -> {"30m" | "1h": buckets kept in step with the 15m ring}
+        self._htf: dict[str, dict[str, OHLCVBuckets]] = {}
+        self._sig: dict[str, SignalState] = {}
 
         limiter = TokenBucket(rate_per_sec=s.REST_RATE_PER_SEC, burst=s.REST_BURST)
         if s.EXCHANGE == "binance":
@@ -58,70 +65,64 @@ class Engine:
 
     async def seed_history(self, symbol: str) -> None:
         candles = await self.ex.fetch_ohlcv(symbol, self.s.PRIMARY_TF, limit=600)
-        df = pd.DataFrame(
-            [
-                {
-                    "ts": _ms_to_dt(c["close_time"]),
-                    "open": c["open"],
-                    "high": c["high"],
-                    "low": c["low"],
-                    "close": c["close"],
-                    "volume": c["volume"],
-                }
-                for c in candles
-            ]
-        ).set_index("ts")
-        self._df15[symbol] = df
-        log.info("seed_history", extra={"symbol": symbol, "rows": len(df)})
-
-    def resample(self, symbol: str, tf: str) -> pd.DataFrame:
-        base = self._df15[symbol]
-        if tf == "30m":
-            rule = "30min"
-        elif tf == "1h":
-            rule = "60min"
-        else:
-            raise ValueError("Unsupported tf")
-        o = base["open"].resample(rule, label="right", closed="right").first()
-        h = base["high"].resample(rule, label="right", closed="right").max()
-        l = base["low"].resample(rule, label="right", closed="right").min()
-        c = base["close"].resample(rule, label="right", closed="right").last()
-        v = base["volume"].resample(rule, label="right", closed="right").sum()
-        return pd.DataFrame({"open": o, "high": h, "low": l, "close": c, "volume": v}).dropna()
-
-    async def on_closed_15m(self, symbol: str, end_ms: int, o: float, h: float, l: float, c: float, v: float) -> None:
-        ts = _ms_to_dt(end_ms)
-        df = self._df15[symbol]
-        df.loc[ts, ["open", "high", "low", "close", "volume"]] = [o, h, l, c, v]
-        df.sort_index(inplace=True)
-        if len(df) > 2000:
-            df = df.iloc[-2000:]
-            self._df15[symbol] = df
+        ring = OHLCVRing(capacity=_HISTORY_BARS)
+        ring.load(candles)
+        self._bars[symbol] = ring
+        htf = {tf: OHLCVBuckets(rule_ns=rule, capacity=_HISTORY_BARS) for tf, rule in _RULE_NS.items()}
+        for b in htf.values():
+            b.rebuild(ring)
+        self._htf[symbol] = htf
+
+        # replay the seed once; from here on each closed bar is a one-step update
+        st = SignalState(self.s.EMA_FAST, self.s.EMA_SLOW, self.s.RSI_PERIOD, self.s.ATR_PERIOD)
+        ts, _, h, l, c, _ = ring.arrays()
+        for row in zip(ts.tolist(), h.tolist(), l.tolist(), c.tolist()):
+            st.update_15m(*row)
+        for tf, b in htf.items():
+            lab, _, _, _, bc, _ = b.bars.arrays()
+            for row in zip(lab.tolist(), bc.tolist()):
+                st.update_htf(tf, *row)
+        self._sig[symbol] = st
+        log.info("seed_history", extra={"symbol": symbol, "rows": len(ring)})
+
+    def record_closed_15m(
+        self, symbol: str, end_ms: int, o: float, h: float, l: float, c: float, v: float
+    ) -> tuple[int, Optional[Signal]]:
+        # bar bookkeeping only (no I/O): every closed bar lands in the history, even when
+        # the decision for it is later superseded. The signal is snapshotted here, with its
+        # bar, since the state moves on as soon as the next bar is recorded
+        ring = self._bars[symbol]
+        st = self._sig[symbol]
+        if ring.append(end_ms * 1_000_000, o, h, l, c, v):
+            st.update_15m(end_ms * 1_000_000, h, l, c)
+            for tf, b in self._htf[symbol].items():
+                b.sync(ring)
+                lab, _, _, _, bc, _ = b.bars.last()
+                st.update_htf(tf, lab, bc)
 
         self._idx[symbol] += 1
-        idx = self._idx[symbol]
+        return self._idx[symbol], st.signal(self.s.RSI_LONG_MIN)
+
+    async def on_closed_15m(self, symbol: str, close: float, idx: int, end_ms: int, sig: Optional[Signal]) -> None:
+        await self.manage_open_position(symbol, float(close))
+        await self.maybe_open_position(symbol, idx, end_ms, sig)
 
-        await self.manage_open_position(symbol, float(c))
-        await self.maybe_open_position(symbol, idx)
+    async def _symbol_worker(self, symbol: str, pending: asyncio.Queue) -> None:
+        # one in flight per symbol: positions stay serialized, other symbols don't wait
+        while True:
+            close, idx, end_ms, sig = await pending.get()
+            await self.on_closed_15m(symbol, close, idx, end_ms, sig)
 
-    async def maybe_open_position(self, symbol: str, idx: int) -> None:
+    async def maybe_open_position(self, symbol: str, idx: int, bar_end_ms: int, sig: Optional[Signal]) -> None:
         if self.portfolio.has_position(symbol):
             return
         if self.portfolio.in_cooldown(symbol, idx):
             return
 
-        df15 = self._df15[symbol]
-        df30 = self.resample(symbol, "30m")
-        df1h = self.resample(symbol, "1h")
-
-        sig = compute_long_signal(
-            df15, df30, df1h,
-            self.s.EMA_FAST, self.s.EMA_SLOW,
-            self.s.RSI_PERIOD, self.s.RSI_LONG_MIN,
-            self.s.ATR_PERIOD,
-        )
         if sig is None or sig.action != "BUY":
-            log.info("signal_hold", extra={"symbol": symbol, "reason": sig.reason if sig else "NO_SIGNAL"})
+            # the one log on every closed bar: skip building the record when INFO is off
+            if log.isEnabledFor(logging.INFO):
+                log.info("signal_hold", extra={"symbol": symbol, "reason": sig.reason if sig else "NO_SIGNAL"})
             return
 
         # ML confirmation
@@ -156,7 +157,8 @@ class Engine:
             symbol=symbol,
             qty=qty,
             entry_price=entry,
-            entry_time=Portfolio.now(),
+            # entries fire on the bar close, so its close time stands in for a clock read
+            entry_time=datetime.fromtimestamp(bar_end_ms / 1000, tz=timezone.utc),
             atr_at_entry=sig.atr_value,
             stop_price=stop,
             tp_price=tp,
@@ -180,55 +182,47 @@ class Engine:
         if pos is None:
             return
 
-        # update best price / trailing
-        if last_close > pos.best_price:
-            pos.best_price = last_close
-            if pos.trailing_enabled:
-                pos.trailing_stop = self.risk.trailing_stop(pos.best_price, pos.atr_at_entry)
-
-        stop_level = min(pos.stop_price, pos.trailing_stop) if pos.trailing_enabled else pos.stop_price
+        # best price / trailing update and exit triggers: the backtest kernel's own step
+        pos.best_price, pos.trailing_stop, stop_level, take_partial, stop_out, take_rest = exit_step(
+            last_close,
+            pos.best_price,
+            pos.trailing_stop,
+            pos.stop_price,
+            pos.tp_price,
+            pos.atr_at_entry,
+            self.risk.stop_atr_mult,
+            pos.trailing_enabled,
+            pos.partial_done,
+        )
 
         # partial TP software fallback
-        if (not pos.partial_done) and last_close >= pos.tp_price:
+        if take_partial:
             qty_part = self.risk.partial_qty(pos.qty)
             if qty_part > 0:
-                sell = await self.router.close_long_market(self.ex, symbol, qty_part)
-                exit_px = self.risk.apply_slippage(sell.avg_price, is_entry=False)
-                notional = qty_part * exit_px
-                fee = self.risk.fee_usd(notional, taker=True)
-                pnl = (exit_px - pos.entry_price) * qty_part - fee
+                exit_px, fee, pnl = await self._execute_exit(symbol, pos, qty_part)
                 pos.qty -= qty_part
                 pos.partial_done = True
                 log.info("partial_tp", extra={"symbol": symbol, "qty": qty_part, "exit": exit_px, "pnl": pnl})
 
-        # stop out
-        if last_close <= stop_level:
+        if stop_out or take_rest:
+            # stop out, or full TP after partial (simple: same TP target)
             qty = pos.qty
             if qty > 0:
-                sell = await self.router.close_long_market(self.ex, symbol, qty)
-                exit_px = self.risk.apply_slippage(sell.avg_price, is_entry=False)
-                notional = qty * exit_px
-                fee = self.risk.fee_usd(notional, taker=True)
-                pnl = (exit_px - pos.entry_price) * qty - fee
+                exit_px, fee, pnl = await self._execute_exit(symbol, pos, qty)
                 await self.db.close_trade(pos.trade_id, exit_px, pnl, fee)
-                log.info("stop_exit", extra={"symbol": symbol, "qty": qty, "exit": exit_px, "pnl": pnl, "stop": stop_level})
+                if stop_out:
+                    log.info("stop_exit", extra={"symbol": symbol, "qty": qty, "exit": exit_px, "pnl": pnl, "stop": stop_level})
+                else:
+                    log.info("tp_exit", extra={"symbol": symbol, "qty": qty, "exit": exit_px, "pnl": pnl})
             await self.router.cancel_all(self.ex, symbol)
             self.portfolio.close(symbol)
-            return
 
-        # full TP after partial (simple: same TP target)
-        if pos.partial_done and last_close >= pos.tp_price:
-            qty = pos.qty
-            if qty > 0:
-                sell = await self.router.close_long_market(self.ex, symbol, qty)
-                exit_px = self.risk.apply_slippage(sell.avg_price, is_entry=False)
-                notional = qty * exit_px
-                fee = self.risk.fee_usd(notional, taker=True)
-                pnl = (exit_px - pos.entry_price) * qty - fee
-                await self.db.close_trade(pos.trade_id, exit_px, pnl, fee)
-                log.info("tp_exit", extra={"symbol": symbol, "qty": qty, "exit": exit_px, "pnl": pnl})
-            await self.router.cancel_all(self.ex, symbol)
-            self.portfolio.close(symbol)
+    async def _execute_exit(self, symbol: str, pos: Position, qty: float) -> tuple[float, float, float]:
+        # market-sell qty; -> (exit price after slippage, taker fee, net pnl)
+        sell = await self.router.close_long_market(self.ex, symbol, qty)
+        exit_px = self.risk.apply_slippage(sell.avg_price, is_entry=False)
+        fee = self.risk.fee_usd(qty * exit_px, taker=True)
+        return exit_px, fee, (exit_px - pos.entry_price) * qty - fee
 
     async def run_live(self) -> None:
         await self.db.init()
@@ -237,39 +231,61 @@ class Engine:
 
         log.info("live_start", extra={"exchange": self.ex.name, "symbols": list(self.s.SYMBOLS), "tf": self.s.PRIMARY_TF})
 
-        async for msg in self.ws.stream_klines(list(self.s.SYMBOLS), self.s.PRIMARY_TF):
-            if not msg.is_closed:
-                continue
-            if msg.symbol not in self._df15:
-                continue
-            await self.on_closed_15m(msg.symbol, msg.end_ms, msg.o, msg.h, msg.l, msg.c, msg.v)
+        # symbol -> newest closed bar still awaiting its decision; a bar that closes while
+        # the previous one is still queued replaces it (its history is recorded either way)
+        pending: dict[str, asyncio.Queue] = {sym: asyncio.Queue(maxsize=1) for sym in self._bars}
+
+        async with asyncio.TaskGroup() as tg:
+            workers = [tg.create_task(self._symbol_worker(sym, q)) for sym, q in pending.items()]
+
+            # per-tick callables bound once; the stream only yields subscribed symbols, so
+            # the membership test below just guards closed bars for a symbol that failed to seed
+            observe, record = self.ex.observe_price, self.record_closed_15m
+            async for msg in self.ws.stream_klines(list(self.s.SYMBOLS), self.s.PRIMARY_TF):
+                # every tick carries the live close; lets order sizing skip a ticker REST call
+                observe(msg.symbol, msg.c)
+                if not msg.is_closed:
+                    continue
+                q = pending.get(msg.symbol)
+                if q is None:
+                    continue
+                idx, sig = record(msg.symbol, msg.end_ms, msg.o, msg.h, msg.l, msg.c, msg.v)
+                if q.full():
+                    q.get_nowait()
+                q.put_nowait((msg.c, idx, msg.end_ms, sig))
+
+            for w in workers:
+                w.cancel()
+
+    async def close(self) -> None:
+        try:
+            await self.db.close()
+        finally:
+            await self.ex.close()
 
     async def run_backtest_cli(self, symbol: str, days: int = 90) -> None:
         candles = await self.ex.fetch_ohlcv(symbol, self.s.PRIMARY_TF, limit=min(2000, days * 96))
-        df15 = pd.DataFrame(
-            [
-                {"ts": _ms_to_dt(c["close_time"]), "open": c["open"], "high": c["high"], "low": c["low"], "close": c["close"], "volume": c["volume"]}
-                for c in candles
-            ]
-        ).set_index("ts")
-        rep = run_backtest(df15, self.s, self.risk, start_balance=self.s.BACKTEST_START_BALANCE)
+        rep = run_backtest(candles_frame(candles), self.s, self.risk, start_balance=self.s.BACKTEST_START_BALANCE)
         log.info("backtest_report", extra={"symbol": symbol, "pnl": rep.pnl, "win_rate": rep.win_rate, "max_dd": rep.max_dd, "sharpe": rep.sharpe, "trades": rep.trades})
 
 
 async def main() -> None:
-    s = Settings()
+    s = get_settings()
     engine = Engine(s)
 
-    # Simple CLI via env:
-    # RUN_BACKTEST=1 BACKTEST_SYMBOL=BTCUSDT BACKTEST_DAYS=120
-    if (np_str := __import__("os").getenv("RUN_BACKTEST")) and np_str.strip() == "1":
-        sym = __import__("os").getenv("BACKTEST_SYMBOL", "BTCUSDT").strip().upper()
-        days = int(__import__("os").getenv("BACKTEST_DAYS", "90"))
-        await engine.run_backtest_cli(sym, days)
-        return
+    try:
+        # Simple CLI via env (parsed once in Settings):
+        # RUN_BACKTEST=1 BACKTEST_SYMBOL=BTCUSDT BACKTEST_DAYS=120
+        if s.RUN_BACKTEST:
+            await engine.run_backtest_cli(s.BACKTEST_SYMBOL, s.BACKTEST_DAYS)
+            return
 
-    await engine.run_live()
+        await engine.run_live()
+    finally:
+        await engine.close()
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(main())
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 from typing import Optional
 
@@ -12,6 +13,9 @@ class MLSignalFilter:
     enabled: bool = True
     min_proba: float = 0.55
     _model: Optional[LogisticRegression] = None
+    # fitted coef_/intercept_, read once so inference skips sklearn's per-call validation
+    _w: Optional[np.ndarray] = None
+    _b: float = 0.0
 
     def fit_placeholder(self, X: np.ndarray, y: np.ndarray) -> None:
         # optional: fit if you have labels; safe skeleton
@@ -21,15 +25,23 @@ class MLSignalFilter:
             return
         self._model = LogisticRegression(max_iter=200)
         self._model.fit(X, y)
+        self._w = np.ascontiguousarray(self._model.coef_[0], dtype=np.float64)
+        self._b = float(self._model.intercept_[0])
 
     def predict_proba(self, features: np.ndarray) -> float:
         if not self.enabled:
             return 1.0
-        if self._model is None:
+        if self._w is None:
             # default permissive but not blind
             return 0.60
-        p = float(self._model.predict_proba(features.reshape(1, -1))[0, 1])
-        return p
+        # not memoized: bar features almost never repeat exactly, and a rounded key would
+        # merge vectors whose atr_pct / EMA slopes (well under 1e-3) differ, flipping decisions
+        # binary logistic regression: P(class 1) = sigmoid(w.x + b), written to not overflow
+        z = float(self._w @ features) + self._b
+        if z >= 0.0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
 
     def allow(self, features: np.ndarray) -> bool:
         return self.predict_proba(features) >= self.min_proba
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from execution._fastresample import resample_ohlcv
+from execution.exchange.base import OHLCV
+
+OHLCV_COLS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(slots=True)
+class OHLCVRing:
+    # last `capacity` closed bars as preallocated columns, overwritten in place;
+    # bars arrive in close-time order, so the ring never needs sorting
+    capacity: int = 2000
+    ts: np.ndarray = field(init=False)  # close time, int64 ns since epoch (UTC)
+    o: np.ndarray = field(init=False)
+    h: np.ndarray = field(init=False)
+    l: np.ndarray = field(init=False)
+    c: np.ndarray = field(init=False)
+    v: np.ndarray = field(init=False)
+    head: int = field(default=0, init=False)  # next slot to write
+    filled: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.ts = np.empty(self.capacity, dtype=np.int64)
+        self.o = np.empty(self.capacity, dtype=np.float64)
+        self.h = np.empty(self.capacity, dtype=np.float64)
+        self.l = np.empty(self.capacity, dtype=np.float64)
+        self.c = np.empty(self.capacity, dtype=np.float64)
+        self.v = np.empty(self.capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.filled
+
+    def load(self, candles: OHLCV) -> None:
+        # replace the contents with the newest `capacity` rows of a columnar fetch
+        self.load_arrays(
+            candles["close_time"] * 1_000_000,
+            *(candles[k] for k in OHLCV_COLS),
+        )
+
+    def load_arrays(self, ts_ns: np.ndarray, *ohlcv: np.ndarray) -> None:
+        n = min(len(ts_ns), self.capacity)
+        if n:
+            self.ts[:n] = ts_ns[-n:]
+            for dst, src in zip((self.o, self.h, self.l, self.c, self.v), ohlcv):
+                dst[:n] = src[-n:]
+        self.head = n % self.capacity
+        self.filled = n
+
+    def _phys(self, i: int) -> int:
+        # slot of the i-th oldest bar
+        return (self.head - self.filled + i) % self.capacity
+
+    def drop_oldest(self) -> None:
+        self.filled -= 1
+
+    def set(self, i: int, o: float, h: float, l: float, c: float, v: float) -> None:
+        p = self._phys(i)
+        self.o[p] = o
+        self.h[p] = h
+        self.l[p] = l
+        self.c[p] = c
+        self.v[p] = v
+
+    def reduce(self, lo: int, hi: int) -> tuple[float, float, float, float, float]:
+        # OHLCV of bars lo..hi-1 (oldest-first positions), in resample's fold order
+        p = self._phys(lo)
+        o, h, l, v = self.o[p], self.h[p], self.l[p], self.v[p]
+        for i in range(lo + 1, hi):
+            p = self._phys(i)
+            h = max(h, self.h[p])
+            l = min(l, self.l[p])
+            v += self.v[p]
+        return o, h, l, self.c[p], v
+
+    def append(self, ts_ns: int, o: float, h: float, l: float, c: float, v: float) -> bool:
+        # a repeat of the newest close time overwrites it; an older one is dropped
+        i = self.head
+        if self.filled:
+            last = (i - 1) % self.capacity
+            if ts_ns < self.ts[last]:
+                return False
+            if ts_ns == self.ts[last]:
+                i = last
+        self.ts[i] = ts_ns
+        self.o[i] = o
+        self.h[i] = h
+        self.l[i] = l
+        self.c[i] = c
+        self.v[i] = v
+        if i == self.head:
+            self.head = (i + 1) % self.capacity
+            self.filled = min(self.filled + 1, self.capacity)
+        return True
+
+    def last(self) -> tuple[int, float, float, float, float, float]:
+        # newest bar as (ts, o, h, l, c, v); the ring must not be empty
+        p = (self.head - 1) % self.capacity
+        return int(self.ts[p]), self.o[p], self.h[p], self.l[p], self.c[p], self.v[p]
+
+    def _ordered(self, arr: np.ndarray) -> np.ndarray:
+        # a plain slice unless the live window wraps past the end of the buffer
+        start = self._phys(0)
+        end = start + self.filled
+        if end <= self.capacity:
+            return arr[start:end]
+        return np.concatenate((arr[start:], arr[: end - self.capacity]))
+
+    def arrays(self) -> tuple[np.ndarray, ...]:
+        # (ts, o, h, l, c, v) oldest first
+        return tuple(self._ordered(a) for a in (self.ts, self.o, self.h, self.l, self.c, self.v))
+
+    def frame(self) -> pd.DataFrame:
+        # oldest-first DataFrame view of the ring
+        return ohlcv_frame(*self.arrays())
+
+
+def ohlcv_frame(ts_ns: np.ndarray, *ohlcv: np.ndarray) -> pd.DataFrame:
+    # bar columns + UTC close-time index ("ts"), built in one constructor call
+    idx = pd.DatetimeIndex(ts_ns.view("datetime64[ns]"), name="ts").tz_localize("UTC")
+    return pd.DataFrame(dict(zip(OHLCV_COLS, ohlcv)), index=idx)
+
+
+def candles_frame(candles: OHLCV) -> pd.DataFrame:
+    # columnar fetch -> DataFrame, without a round-trip through row dicts
+    return ohlcv_frame(candles["close_time"] * 1_000_000, *(candles[k] for k in OHLCV_COLS))
+
+
+def resample(src: OHLCVRing, rule_ns: int) -> tuple[np.ndarray, ...]:
+    # (label, o, h, l, c, v) of the whole ring, labels in ns
+    return resample_ohlcv(*src.arrays(), rule_ns)
+
+
+@dataclass(slots=True)
+class OHLCVBuckets:
+    # higher-TF bars of a 15m ring, equal to resample(src) but kept in step from the
+    # ring's two ends: each sync re-reduces only the newest bucket and, once old 15m
+    # bars fall off, the oldest one
+    rule_ns: int
+    capacity: int = 2000
+    bars: OHLCVRing = field(init=False)  # ts = bucket label (right edge), ns
+    _first_ts: int = field(default=-1, init=False)  # src's oldest close time at last sync
+
+    def __post_init__(self) -> None:
+        self.bars = OHLCVRing(capacity=self.capacity)
+
+    def rebuild(self, src: OHLCVRing) -> None:
+        self.bars.load_arrays(*resample(src, self.rule_ns))
+        self._first_ts = int(src.ts[src._phys(0)]) if src.filled else -1
+
+    def _bucket(self, ts_ns: int) -> int:
+        return -(-ts_ns // self.rule_ns)
+
+    def sync(self, src: OHLCVRing) -> None:
+        n = src.filled
+        if not n:
+            self.rebuild(src)
+            return
+        bars = self.bars
+
+        # oldest bucket: drop buckets whose 15m bars are all gone, re-reduce the partial one
+        first = int(src.ts[src._phys(0)])
+        if first != self._first_ts:
+            f = self._bucket(first)
+            while bars.filled and bars.ts[bars._phys(0)] < f * self.rule_ns:
+                bars.drop_oldest()
+            j = 1
+            while j < n and self._bucket(int(src.ts[src._phys(j)])) == f:
+                j += 1
+            if bars.filled:
+                bars.set(0, *src.reduce(0, j))
+            self._first_ts = first
+
+        # newest bucket: overwritten while it is still filling, appended once it opens
+        b = self._bucket(int(src.ts[src._phys(n - 1)]))
+        i = n - 1
+        while i > 0 and self._bucket(int(src.ts[src._phys(i - 1)])) == b:
+            i -= 1
+        bars.append(b * self.rule_ns, *src.reduce(i, n))
+
+    def frame(self) -> pd.DataFrame:
+        return self.bars.frame()
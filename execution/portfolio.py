@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional
 
 
@@ -45,7 +45,3 @@ class Portfolio:
     def in_cooldown(self, symbol: str, current_idx: int) -> bool:
         until = self.cooldown_until_idx.get(symbol, -1)
         return current_idx < until
-
-    @staticmethod
-    def now() -> datetime:
-        return datetime.now(timezone.utc)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class RiskManager:
     position_pct: float
     stop_atr_mult: float
@@ -13,12 +13,17 @@ class RiskManager:
     maker_fee: float
     slippage_bps: float
     partial_tp_pct: float
+    _slip: float = field(init=False, repr=False)  # slippage_bps as a fraction of price
+
+    def __post_init__(self) -> None:
+        self._slip = self.slippage_bps / 10000.0
 
     def order_notional_usdt(self, usdt_balance: float) -> float:
         return max(0.0, usdt_balance * self.position_pct)
 
     def apply_slippage(self, price: float, is_entry: bool) -> float:
-        slip = price * (self.slippage_bps / 10000.0)
+        # price +/- price * frac (not price * (1 +/- frac)): rounds like the backtest kernel
+        slip = price * self._slip
         return price + slip if is_entry else price - slip
 
     def stops_from_atr(self, entry: float, atr_val: float) -> Tuple[float, float]:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from dataclasses import dataclass
 from typing import Optional
@@ -18,9 +19,11 @@ class ExecResult:
 
 class SmartRouter:
     async def open_long(self, ex: Exchange, symbol: str, quote_usdt: float) -> OrderResult:
-        log.info("open_long_request", extra={"exchange": ex.name, "symbol": symbol, "quote_usdt": quote_usdt})
         res = await ex.market_buy_quote(symbol, quote_usdt)
-        log.info("open_long_done", extra={"exchange": ex.name, "symbol": symbol, "qty": res.executed_qty, "avg": res.avg_price, "status": res.status})
+        # one record per order (request fields included), built only if INFO is on;
+        # a failed order propagates to the caller instead
+        if log.isEnabledFor(logging.INFO):
+            log.info("open_long_done", extra={"exchange": ex.name, "symbol": symbol, "quote_usdt": quote_usdt, "qty": res.executed_qty, "avg": res.avg_price, "status": res.status})
         return res
 
     async def place_partial_tp_limit(self, ex: Exchange, symbol: str, qty: float, tp_price: float) -> Optional[OrderResult]:
@@ -34,9 +37,9 @@ class SmartRouter:
             return None
 
     async def close_long_market(self, ex: Exchange, symbol: str, qty: float) -> OrderResult:
-        log.info("close_long_request", extra={"exchange": ex.name, "symbol": symbol, "qty": qty})
         res = await ex.market_sell_base(symbol, qty)
-        log.info("close_long_done", extra={"exchange": ex.name, "symbol": symbol, "qty": res.executed_qty, "avg": res.avg_price, "status": res.status})
+        if log.isEnabledFor(logging.INFO):
+            log.info("close_long_done", extra={"exchange": ex.name, "symbol": symbol, "req_qty": qty, "qty": res.executed_qty, "avg": res.avg_price, "status": res.status})
         return res
 
     async def cancel_all(self, ex: Exchange, symbol: str) -> None:
@@ -45,3 +48,16 @@ class SmartRouter:
             log.info("cancel_all_ok", extra={"exchange": ex.name, "symbol": symbol})
         except Exception as e:
             log.warning("cancel_all_failed", extra={"exchange": ex.name, "symbol": symbol, "err": str(e)})
+
+    # batch variants: one concurrent round of orders instead of one RTT per symbol; a failed
+    # order comes back as its exception in place of the result so the rest still go through
+
+    async def open_longs(self, ex: Exchange, requests: list[tuple[str, float]]) -> list[OrderResult | BaseException]:
+        return await asyncio.gather(*(self.open_long(ex, sym, quote) for sym, quote in requests), return_exceptions=True)
+
+    async def close_longs_market(self, ex: Exchange, requests: list[tuple[str, float]]) -> list[OrderResult | BaseException]:
+        return await asyncio.gather(*(self.close_long_market(ex, sym, qty) for sym, qty in requests), return_exceptions=True)
+
+    async def cancel_all_many(self, ex: Exchange, symbols: list[str]) -> None:
+        # cancel_all already logs and swallows per-symbol failures
+        await asyncio.gather(*(self.cancel_all(ex, sym) for sym in symbols))
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from collections import deque
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
 
 import numpy as np
 import pandas as pd
 
-from execution.indicators import ema, rsi, atr
+from execution.indicators import _atr_kernel, _ema_kernel, _ewm_coeffs, _ewm_step, _rsi_kernel, _rsi_value, _trend_up
+
+# the kernels' scalar steps as plain Python, for one-bar updates (same arithmetic, no dispatch)
+_coeffs, _step, _rsi_of = _ewm_coeffs.py_func, _ewm_step.py_func, _rsi_value.py_func
+
+# shared all-zero features for holds; read-only so no consumer can alter it
+_HOLD_FEATS_ZERO = np.zeros(6, dtype=float)
+_HOLD_FEATS_ZERO.setflags(write=False)
+
+# FILTERS_FAIL holds only feed logging (the ML filter scores BUYs), so by default they
+# carry the shared zero vector; True restores dist / rsi / trend in their features
+RETURN_HOLD_FEATURES = False
 
 
 @dataclass(frozen=True)
@@ -17,58 +29,256 @@ class Signal:
     features: np.ndarray
 
 
-def compute_long_signal(
-    df15: pd.DataFrame,
-    df30: pd.DataFrame,
-    df1h: pd.DataFrame,
-    ema_fast: int,
+def warmup_ok(
+    n15: int | np.ndarray,
+    n30: int | np.ndarray,
+    n1h: int | np.ndarray,
     ema_slow: int,
     rsi_period: int,
-    rsi_min: float,
     atr_period: int,
-) -> Optional[Signal]:
+) -> bool | np.ndarray:
+    # bitwise ops so this also works elementwise on bar-count arrays
     need = max(ema_slow, rsi_period, atr_period) + 5
-    if len(df15) < need or len(df30) < ema_slow + 5 or len(df1h) < ema_slow + 5:
-        return None
+    return (n15 >= need) & (n30 >= ema_slow + 5) & (n1h >= ema_slow + 5)
 
-    c15 = df15["close"].astype(float)
-    h15 = df15["high"].astype(float)
-    l15 = df15["low"].astype(float)
 
-    ef15 = ema(c15, ema_fast)
-    es15 = ema(c15, ema_slow)
-    r15 = rsi(c15, rsi_period)
-    a15 = atr(h15, l15, c15, atr_period)
+def signal_from_readings(
+    close: float,
+    ema_fast: float,
+    ema_slow: float,
+    ema_fast_lag: float,
+    ema_slow_lag: float,
+    rsi_val: float,
+    atr_val: float,
+    up30: bool,
+    up1h: bool,
+    rsi_min: float,
+) -> Signal:
+    # *_lag are the 15m EMA readings 4 bars back (slope features)
+    up15 = ema_fast > ema_slow
+    rsi_ok = rsi_val >= rsi_min
+    if atr_val <= 0:
+        return Signal("HOLD", "ATR_ZERO", atr_val, _HOLD_FEATS_ZERO)
 
-    up15 = float(ef15.iloc[-1]) > float(es15.iloc[-1])
-    up30 = float(ema(df30["close"].astype(float), ema_fast).iloc[-1]) > float(ema(df30["close"].astype(float), ema_slow).iloc[-1])
-    up1h = float(ema(df1h["close"].astype(float), ema_fast).iloc[-1]) > float(ema(df1h["close"].astype(float), ema_slow).iloc[-1])
+    # the higher TFs only ever count together: one conjunction, one feature value
+    up_htf = up30 and up1h
+    htf_feat = 1.0 if up_htf else 0.0
 
-    rsi_ok = float(r15.iloc[-1]) >= rsi_min
-    atr_val = float(a15.iloc[-1])
-    if atr_val <= 0:
-        return Signal("HOLD", "ATR_ZERO", atr_val, np.zeros(6, dtype=float))
+    # denominators are floored at 1e-12 once each; `f if x < f else x` is max(x, f) without
+    # the builtin call (NaN passes through alike). They stay divisions, not reciprocal
+    # products, so readings round exactly like long_entry_mask's.
 
     # avoid overextension vs slow EMA (conservative)
-    dist = (float(c15.iloc[-1]) - float(es15.iloc[-1])) / max(float(es15.iloc[-1]), 1e-12)
+    dist = (close - ema_slow) / (1e-12 if ema_slow < 1e-12 else ema_slow)
     not_too_extended = dist < 0.03
 
-    if up15 and up30 and up1h and rsi_ok and not_too_extended:
-        atr_pct = atr_val / max(float(c15.iloc[-1]), 1e-12)
-        slope_fast = float(ef15.iloc[-1] - ef15.iloc[-5]) / max(float(c15.iloc[-1]), 1e-12)
-        slope_slow = float(es15.iloc[-1] - es15.iloc[-5]) / max(float(c15.iloc[-1]), 1e-12)
+    if up15 and up_htf and rsi_ok and not_too_extended:
+        den_c = 1e-12 if close < 1e-12 else close
+        atr_pct = atr_val / den_c
+        slope_fast = (ema_fast - ema_fast_lag) / den_c
+        slope_slow = (ema_slow - ema_slow_lag) / den_c
 
         feats = np.array(
             [
                 float(dist),
-                float(r15.iloc[-1]) / 100.0,
+                rsi_val / 100.0,
                 float(atr_pct),
                 float(slope_fast),
                 float(slope_slow),
-                float(up30 and up1h),
+                htf_feat,
             ],
             dtype=float,
         )
         return Signal("BUY", "TREND_OK", atr_val, feats)
 
-    return Signal("HOLD", "FILTERS_FAIL", atr_val, np.array([dist, float(r15.iloc[-1]) / 100.0, 0, 0, 0, float(up30 and up1h)], dtype=float))
+    if not RETURN_HOLD_FEATURES:
+        return Signal("HOLD", "FILTERS_FAIL", atr_val, _HOLD_FEATS_ZERO)
+    return Signal("HOLD", "FILTERS_FAIL", atr_val, np.array([dist, rsi_val / 100.0, 0, 0, 0, htf_feat], dtype=float))
+
+
+def long_entry_mask(
+    close: np.ndarray,
+    ema_fast: np.ndarray,
+    ema_slow: np.ndarray,
+    rsi_vals: np.ndarray,
+    atr_vals: np.ndarray,
+    up30: np.ndarray,
+    up1h: np.ndarray,
+    rsi_min: float,
+) -> np.ndarray:
+    # vectorised BUY condition of signal_from_readings (warmup is up to the caller)
+    dist = (close - ema_slow) / np.maximum(ema_slow, 1e-12)
+    return (atr_vals > 0) & (ema_fast > ema_slow) & up30 & up1h & (rsi_vals >= rsi_min) & (dist < 0.03)
+
+
+class Bars(NamedTuple):
+    # the columns the signal reads, as contiguous float64 arrays (oldest first)
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+
+
+def bars_from_df(df: pd.DataFrame) -> Bars:
+    # pandas -> Bars once at the I/O edge, not per signal evaluation
+    return Bars(
+        np.ascontiguousarray(df["close"].to_numpy(dtype=np.float64)),
+        np.ascontiguousarray(df["high"].to_numpy(dtype=np.float64)),
+        np.ascontiguousarray(df["low"].to_numpy(dtype=np.float64)),
+    )
+
+
+def compute_long_signal(
+    b15: Bars,
+    b30: Bars,
+    b1h: Bars,
+    ema_fast: int,
+    ema_slow: int,
+    rsi_period: int,
+    rsi_min: float,
+    atr_period: int,
+) -> Optional[Signal]:
+    if not warmup_ok(len(b15.close), len(b30.close), len(b1h.close), ema_slow, rsi_period, atr_period):
+        return None
+
+    # no-ops for bars_from_df output; the kernels are compiled for contiguous input only
+    c15, h15, l15 = (np.ascontiguousarray(a, dtype=np.float64) for a in b15)
+    c30 = np.ascontiguousarray(b30.close, dtype=np.float64)
+    c1h = np.ascontiguousarray(b1h.close, dtype=np.float64)
+
+    af, as_ = 2.0 / (1.0 + ema_fast), 2.0 / (1.0 + ema_slow)
+    ef15 = _ema_kernel(c15, af)
+    es15 = _ema_kernel(c15, as_)
+    r15 = _rsi_kernel(c15, rsi_period)
+    a15 = _atr_kernel(h15, l15, c15, atr_period)
+
+    # signal_from_readings only reads the flags as up30 and up1h, and not at all on
+    # ATR_ZERO: the 1h pass runs only behind a rising 30m, both only behind a live ATR
+    up30 = not (a15[-1] <= 0) and bool(_trend_up(c30, ema_fast, ema_slow))
+    up1h = up30 and bool(_trend_up(c1h, ema_fast, ema_slow))
+
+    return signal_from_readings(
+        float(c15[-1]),
+        float(ef15[-1]),
+        float(es15[-1]),
+        float(ef15[-5]),
+        float(es15[-5]),
+        float(r15[-1]),
+        float(a15[-1]),
+        up30,
+        up1h,
+        rsi_min,
+    )
+
+
+@dataclass(slots=True)
+class _TrendState:
+    # fast/slow EMA of a bar close whose newest bar may still be revised: `ef`/`es` cover
+    # every bar before the pending one, which is only folded in once a newer bar arrives
+    kf: tuple[float, float, float]
+    ks: tuple[float, float, float]
+    ef: float = float("nan")
+    es: float = float("nan")
+    n: int = 0
+    ts: int = -1  # close time / label of the pending bar
+    close: float = float("nan")
+
+    def update(self, ts: int, close: float) -> None:
+        if ts != self.ts:
+            if self.n:
+                self.ef = _step(self.ef, self.close, self.kf)
+                self.es = _step(self.es, self.close, self.ks)
+            self.n += 1
+            self.ts = ts
+        self.close = close
+
+    def up(self) -> bool:
+        return _step(self.ef, self.close, self.kf) > _step(self.es, self.close, self.ks)
+
+
+@dataclass(slots=True)
+class _PrimaryState:
+    # the 15m readings of compute_long_signal carried bar to bar, pending bar as above
+    kf: tuple[float, float, float]
+    ks: tuple[float, float, float]
+    kw: tuple[float, float, float]  # Wilder smoothing (RSI)
+    ka: tuple[float, float, float]  # Wilder smoothing (ATR)
+    ef: float = float("nan")
+    es: float = float("nan")
+    gain: float = float("nan")
+    loss: float = float("nan")
+    atr: float = float("nan")
+    prev_close: float = float("nan")
+    # committed (ef, es) of the last 4 bars; lags[0] is the reading 4 bars back
+    lags: deque = field(default_factory=lambda: deque(maxlen=4))
+    n: int = 0
+    ts: int = -1
+    h: float = float("nan")
+    l: float = float("nan")
+    c: float = float("nan")
+
+    def _readings(self) -> tuple[float, float, float, float, float, float]:
+        # (ef, es, gain, loss, atr) with the pending bar folded in, and its close
+        c, pc = self.c, self.prev_close
+        tr = abs(self.h - self.l)
+        gain, loss = self.gain, self.loss
+        if pc == pc:
+            tr = max(tr, abs(self.h - pc), abs(self.l - pc))
+            d = c - pc
+            gain = _step(gain, max(d, 0.0), self.kw)
+            loss = _step(loss, max(-d, 0.0), self.kw)
+        return (
+            _step(self.ef, c, self.kf),
+            _step(self.es, c, self.ks),
+            gain,
+            loss,
+            _step(self.atr, tr, self.ka),
+            c,
+        )
+
+    def update(self, ts: int, h: float, l: float, c: float) -> None:
+        if ts != self.ts:
+            if self.n:
+                self.ef, self.es, self.gain, self.loss, self.atr, self.prev_close = self._readings()
+                self.lags.append((self.ef, self.es))
+            self.n += 1
+            self.ts = ts
+        self.h, self.l, self.c = h, l, c
+
+
+class SignalState:
+    """compute_long_signal for one symbol, carried forward one bar at a time.
+
+    Each new bar costs a handful of EMA steps instead of a pass over the whole
+    history; readings equal compute_long_signal over every bar fed so far. A bar
+    (or 30m/1h bucket) fed again with the same close time / label replaces the
+    previous reading of it.
+    """
+
+    __slots__ = ("ema_slow", "rsi_period", "atr_period", "p15", "t30", "t1h")
+
+    def __init__(self, ema_fast: int, ema_slow: int, rsi_period: int, atr_period: int) -> None:
+        self.ema_slow = ema_slow
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        kf = _coeffs(2.0 / (1.0 + ema_fast))
+        ks = _coeffs(2.0 / (1.0 + ema_slow))
+        self.p15 = _PrimaryState(kf, ks, _coeffs(1.0 / rsi_period), _coeffs(1.0 / atr_period))
+        self.t30 = _TrendState(kf, ks)
+        self.t1h = _TrendState(kf, ks)
+
+    def update_15m(self, ts: int, h: float, l: float, c: float) -> None:
+        self.p15.update(ts, h, l, c)
+
+    def update_htf(self, tf: str, label: int, close: float) -> None:
+        (self.t30 if tf == "30m" else self.t1h).update(label, close)
+
+    def signal(self, rsi_min: float) -> Optional[Signal]:
+        p = self.p15
+        if not warmup_ok(p.n, self.t30.n, self.t1h.n, self.ema_slow, self.rsi_period, self.atr_period):
+            return None
+        ef, es, gain, loss, atr_val, c = p._readings()
+        ef_lag, es_lag = p.lags[0]
+        # same short-circuit as compute_long_signal
+        up30 = not (atr_val <= 0) and self.t30.up()
+        up1h = up30 and self.t1h.up()
+        return signal_from_readings(c, ef, es, ef_lag, es_lag, _rsi_of(gain, loss), atr_val, up30, up1h, rsi_min)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
 
 
@@ -12,14 +13,23 @@ class WalkForwardConfig:
     step_ratio: float = 0.1
 
 
-def walk_forward_splits(df: pd.DataFrame, cfg: WalkForwardConfig) -> Iterable[tuple[pd.DataFrame, pd.DataFrame]]:
-    n = len(df)
+def walk_forward_windows(n: int, cfg: WalkForwardConfig) -> Iterable[tuple[slice, slice]]:
+    # (train, test) row ranges over n rows; the window slides by one test length
     train_n = int(n * cfg.train_ratio)
     step_n = max(1, int(n * cfg.step_ratio))
 
     start = 0
     while start + train_n + step_n <= n:
-        train = df.iloc[start : start + train_n]
-        test = df.iloc[start + train_n : start + train_n + step_n]
-        yield train, test
+        yield slice(start, start + train_n), slice(start + train_n, start + train_n + step_n)
         start += step_n
+
+
+def walk_forward_splits(df: pd.DataFrame, cfg: WalkForwardConfig) -> Iterable[tuple[pd.DataFrame, pd.DataFrame]]:
+    for train, test in walk_forward_windows(len(df), cfg):
+        yield df.iloc[train], df.iloc[test]
+
+
+def walk_forward_array_splits(arr: np.ndarray, cfg: WalkForwardConfig) -> Iterable[tuple[np.ndarray, np.ndarray]]:
+    # same windows as zero-copy row views, for callers that work on raw columns
+    for train, test in walk_forward_windows(len(arr), cfg):
+        yield arr[train], arr[test]